@@ -0,0 +1,141 @@
+"""
+Compares DBManager served from a thread pool with AsyncDBManager served from one event loop under concurrent load.
+
+Usage:
+    python -m benchmarks.bench_async --concurrency 1 10 50 --requests 500 --output bench_async.json
+
+Uses the data already in the database from the .env file, e.g. populated by `benchmarks.bench_reports` or a loaded
+snapshot. For every concurrency level, --requests report calls cycling through REPORTS are served by that many
+threads and by that many concurrent tasks sharing one AsyncDBManager. Every thread borrows a connection for each
+call, as AsyncDBManager does, so the latencies on both sides include the wait for a free connection. The result
+cache is disabled unless --cache is given, so every call reaches the database. Both managers share connection
+pools of DB_POOL_MAX_SIZE connections. The throughput and latency percentiles are written as JSON.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List
+
+from benchmarks.bench_reports import KEYWORD, PAGE_SIZE, SEARCH_QUERY, percentile
+from config import DATABASE_CONFIG, DB_POOL_MAX_SIZE
+from vacancy_db_manager.async_db_manager import AsyncDBManager, close_async_pools
+from vacancy_db_manager.db_manager import DBManager
+
+REPORTS: Dict[str, Callable[[Any], Any]] = {
+    'get_companies_and_vacancies_count': lambda db: db.get_companies_and_vacancies_count(),
+    'get_avg_salary': lambda db: db.get_avg_salary(),
+    'get_salary_statistics': lambda db: db.get_salary_statistics(),
+    'get_vacancies_with_keyword': lambda db: db.get_vacancies_with_keyword(KEYWORD),
+    'search_vacancies': lambda db: db.search_vacancies(SEARCH_QUERY),
+    'get_vacancies_page': lambda db: db.get_vacancies_page(PAGE_SIZE),
+}
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, Any]:
+    """
+    Summarizes the latencies of the calls of one run.
+    Args:
+        latencies (List[float]): The latency of every call in seconds.
+        elapsed (float): The wall time of the run in seconds.
+    Returns:
+        Dict[str, Any]: The number of calls, the calls per second and the latency percentiles in milliseconds.
+    """
+    return {
+        'requests': len(latencies),
+        'requests_per_second': len(latencies) / elapsed if elapsed else None,
+        'latency_ms': {
+            'p50': percentile(latencies, 50) * 1000,
+            'p90': percentile(latencies, 90) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'max': max(latencies) * 1000,
+        },
+    }
+
+
+def run_sync(concurrency: int, requests: int, use_cache: bool) -> Dict[str, Any]:
+    """
+    Serves the calls with `concurrency` threads. Every call is made with a new DBManager, which borrows a
+    connection from the pool, and is timed including the wait for that connection.
+    """
+    reports = list(REPORTS.values())
+
+    def worker(worker_index: int) -> List[float]:
+        latencies = []
+        for i in range(worker_index, requests, concurrency):
+            started = time.perf_counter()
+            with DBManager(DATABASE_CONFIG, use_cache=use_cache) as db:
+                reports[i % len(reports)](db)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = [latency for result in executor.map(worker, range(concurrency)) for latency in result]
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def run_async(concurrency: int, requests: int, use_cache: bool) -> Dict[str, Any]:
+    """
+    Serves the calls with `concurrency` tasks sharing one AsyncDBManager.
+    """
+    reports: List[Callable[[AsyncDBManager], Awaitable[Any]]] = list(REPORTS.values())
+    latencies: List[float] = []
+
+    async with AsyncDBManager(DATABASE_CONFIG, use_cache=use_cache) as db:
+        async def worker(worker_index: int) -> None:
+            for i in range(worker_index, requests, concurrency):
+                started = time.perf_counter()
+                await reports[i % len(reports)](db)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        return summarize(latencies, time.perf_counter() - started)
+
+
+async def run(concurrency_levels: List[int], requests: int, use_cache: bool, output: str) -> None:
+    """
+    Runs both managers at every concurrency level, after one warm-up call of every report, and writes the
+    results as JSON.
+    Args:
+        concurrency_levels (List[int]): The numbers of concurrent callers.
+        requests (int): The number of calls at every level.
+        use_cache (bool): Whether the result cache is used.
+        output (str): The path of the JSON file, '-' for the standard output.
+    """
+    run_sync(len(REPORTS), len(REPORTS), use_cache)
+    await run_async(len(REPORTS), len(REPORTS), use_cache)
+
+    results: Dict[str, Any] = {'requests': requests, 'cache': use_cache, 'pool_size': DB_POOL_MAX_SIZE,
+                               'levels': []}
+    try:
+        for concurrency in concurrency_levels:
+            sync_stats = await asyncio.to_thread(run_sync, concurrency, requests, use_cache)
+            async_stats = await run_async(concurrency, requests, use_cache)
+            results['levels'].append({'concurrency': concurrency, 'sync': sync_stats, 'async': async_stats})
+            for name, stats in (('sync', sync_stats), ('async', async_stats)):
+                print(f'{concurrency:>5} {name:>5}: {stats["requests_per_second"]:10.0f} req/s, '
+                      f'p50 {stats["latency_ms"]["p50"]:8.1f} ms, p99 {stats["latency_ms"]["p99"]:8.1f} ms')
+    finally:
+        await close_async_pools()
+
+    if output == '-':
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+    else:
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+        print(f'Результаты записаны в {output}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50],
+                        help='numbers of concurrent callers')
+    parser.add_argument('--requests', type=int, default=500, help='number of calls at every concurrency level')
+    parser.add_argument('--cache', action='store_true', help='use the result cache')
+    parser.add_argument('--output', default='bench_async.json', help="JSON file for the results, '-' for stdout")
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency, args.requests, args.cache, args.output))
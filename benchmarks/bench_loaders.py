@@ -0,0 +1,99 @@
+"""
+Compares the row-by-row INSERT loader with the bulk COPY and execute_values loaders on a local PostgreSQL.
+
+Usage:
+    python -m benchmarks.bench_loaders --rows 100000
+
+The database from the .env file is used, its employers and vacancies tables are truncated before every run.
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+import psycopg2
+from psycopg2 import sql
+
+from config import DATABASE_CONFIG
+from vacancy_db_manager.db_creator import VACANCY_COLUMNS, bulk_upsert, create_tables, vacancy_rows
+
+EMPLOYERS_COUNT = 100
+
+
+def generate_vacancies(rows: int) -> List[Dict[str, Any]]:
+    """
+    Generates synthetic vacancies spread over EMPLOYERS_COUNT employers.
+    Args:
+        rows (int): The number of vacancies to generate.
+    Returns:
+        List[Dict[str, Any]]: The generated vacancies.
+    """
+    return [{
+        'vacancy_id': i,
+        'employer_id': i % EMPLOYERS_COUNT + 1,
+        'name': f'Вакансия {i}',
+        'description': f'Требования к кандидату\tи обязанности {i}',
+        'salary': 30000 + i % 500 * 1000,
+        'url': f'https://hh.ru/vacancy/{i}',
+    } for i in range(1, rows + 1)]
+
+
+def load_row_by_row(cursor, vacancies: List[Dict[str, Any]]) -> None:
+    """
+    The previous loader: one INSERT statement per vacancy.
+    """
+    for vac in vacancies:
+        cursor.execute(
+            sql.SQL(
+                "INSERT INTO vacancies (vacancy_id, employer_id, name, description, salary, url) "
+                "VALUES (%s, %s, %s, %s, %s, %s) ON CONFLICT (vacancy_id) DO NOTHING;"),
+            (vac['vacancy_id'], vac['employer_id'], vac['name'], vac.get('description'), vac.get('salary'),
+             vac['url'])
+        )
+
+
+def load_bulk(method: str) -> Callable[[Any, List[Dict[str, Any]]], None]:
+    """
+    Returns a loader that uses `bulk_upsert` with the given method. The rows are built by `vacancy_rows`, as
+    the loaders of the application do.
+    """
+    def load(cursor, vacancies: List[Dict[str, Any]]) -> None:
+        bulk_upsert(cursor, 'vacancies', VACANCY_COLUMNS, 'vacancy_id', vacancy_rows(vacancies), method=method)
+    return load
+
+
+def run(rows: int) -> None:
+    """
+    Runs every loader on the same data and prints the elapsed time and throughput.
+    Args:
+        rows (int): The number of vacancies to load.
+    """
+    create_tables()
+    vacancies = generate_vacancies(rows)
+    loaders = {
+        'row-by-row': load_row_by_row,
+        'execute_values': load_bulk('values'),
+        'copy': load_bulk('copy'),
+    }
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    try:
+        for name, loader in loaders.items():
+            with conn.cursor() as cursor:
+                cursor.execute("TRUNCATE vacancies, employers CASCADE")
+                cursor.execute("INSERT INTO employers (employer_id, employer_name, url) "
+                               "SELECT i, 'Компания ' || i, 'https://hh.ru/employer/' || i "
+                               "FROM generate_series(1, %s) AS i", (EMPLOYERS_COUNT,))
+                conn.commit()
+
+                started = time.perf_counter()
+                loader(cursor, vacancies)
+                conn.commit()
+                elapsed = time.perf_counter() - started
+            print(f'{name:>15}: {elapsed:8.2f} s, {rows / elapsed:10.0f} rows/s')
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='number of vacancies to load')
+    run(parser.parse_args().rows)
@@ -0,0 +1,94 @@
+"""
+Compares the throughput of the previous per-item jmespath.search vacancy parsing with the current parsers.
+
+Usage:
+    python -m benchmarks.bench_parsing --items 100000
+
+No network or database access is needed.
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+import jmespath
+
+from vacancy_db_manager.parsers import parse_vacancy, parse_vacancy_rows
+
+PAGE_SIZE = 100
+
+
+def generate_items(count: int) -> List[Dict[str, Any]]:
+    """
+    Generates synthetic vacancy items shaped like the API response.
+    Args:
+        count (int): The number of items to generate.
+    Returns:
+        List[Dict[str, Any]]: The generated items.
+    """
+    return [{
+        'id': str(i),
+        'name': f'Вакансия {i}',
+        'employer': {'id': str(i % 100 + 1), 'name': f'Компания {i % 100 + 1}'},
+        'salary': {'from': 30000 + i % 500 * 1000 if i % 3 else None, 'to': 200000, 'currency': 'RUR'},
+        'snippet': {'requirement': f'Требования {i}', 'responsibility': f'Обязанности {i}'},
+        'alternate_url': f'https://hh.ru/vacancy/{i}',
+        'published_at': '2024-07-01T10:00:00+0300',
+        'archived': False,
+    } for i in range(1, count + 1)]
+
+
+def parse_legacy(vac: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The previous parser: the JMESPath query is parsed again for every vacancy.
+    """
+    salary_from = vac.get('salary', {}).get('from')
+    salary_to = vac.get('salary', {}).get('to')
+    salary = salary_from if salary_from is not None else salary_to
+
+    query = """
+    {
+        vacancy_id: id,
+        employer_id: employer.id,
+        name: name,
+        description: snippet.requirement || '' && snippet.responsibility || '',
+        salary: salary,
+        url: alternate_url
+    }
+    """
+    parsed_data = jmespath.search(query, vac)
+    parsed_data['salary'] = salary
+    return parsed_data
+
+
+def measure(parse_page: Callable[[List[Dict[str, Any]]], Any], items: List[Dict[str, Any]]) -> float:
+    """
+    Parses the items page by page and returns the throughput.
+    Returns:
+        float: Parsed items per second.
+    """
+    started = time.perf_counter()
+    for start in range(0, len(items), PAGE_SIZE):
+        parse_page(items[start:start + PAGE_SIZE])
+    return len(items) / (time.perf_counter() - started)
+
+
+def run(count: int) -> None:
+    """
+    Runs every parser on the same items and prints the throughput.
+    Args:
+        count (int): The number of items to parse.
+    """
+    items = generate_items(count)
+    parsers = {
+        'jmespath.search': lambda page: [parse_legacy(vac) for vac in page],
+        'parse_vacancy': lambda page: [parse_vacancy(vac) for vac in page],
+        'parse_vacancy_rows': parse_vacancy_rows,
+    }
+    for name, parse_page in parsers.items():
+        print(f'{name:>18}: {measure(parse_page, items):12.0f} items/s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=100000, help='number of vacancy items to parse')
+    run(parser.parse_args().items)
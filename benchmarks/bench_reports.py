@@ -0,0 +1,264 @@
+"""
+Measures the DBManager report methods and the bulk loaders on synthetic data of growing size.
+
+Usage:
+    python -m benchmarks.bench_reports --scales 10000 1000000 10000000 --repeat 5 --output results.json
+
+For every scale the employers and vacancies tables of the database from the .env file are truncated and filled
+with the given number of synthetic vacancies, generated by PostgreSQL itself. Every report method is then run
+once to warm up and --repeat times more, recording the latency percentiles, the rows per second and the peak
+Python memory of one run. The result cache is disabled, so every call reaches PostgreSQL. The loaders upsert
+--load-rows vacancies, half of them new, in a transaction that is rolled back, so the data set stays the same.
+With --snapshot the replay of a snapshot saved by `python main.py snapshot export` is measured the same way,
+giving a load benchmark on real data without network access. The results are written as JSON to compare
+between releases.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psycopg2
+
+from config import DATABASE_CONFIG
+from vacancy_db_manager.db_creator import VACANCY_COLUMNS, bulk_upsert, create_tables, refresh_statistics
+from vacancy_db_manager.db_manager import DBManager
+from vacancy_db_manager.snapshots import SNAPSHOT_KEYS, iter_snapshot
+
+KEYWORD = 'Python'
+SEARCH_QUERY = 'python разработчик'
+PAGE_SIZE = 100
+TITLES = ['Python разработчик', 'Java разработчик', 'Аналитик данных', 'Менеджер проектов', 'DevOps инженер',
+          'Тестировщик', 'Дизайнер интерфейсов', 'Системный администратор']
+
+REPORTS: Dict[str, Callable[[DBManager], int]] = {
+    'get_companies_and_vacancies_count': lambda db: len(db.get_companies_and_vacancies_count().rows),
+    'get_all_vacancies': lambda db: len(db.get_all_vacancies().rows),
+    'get_avg_salary': lambda db: len(db.get_avg_salary().rows),
+    'get_vacancies_with_higher_salary': lambda db: len(db.get_vacancies_with_higher_salary().rows),
+    'get_vacancies_with_keyword': lambda db: len(db.get_vacancies_with_keyword(KEYWORD).rows),
+    'get_salary_statistics': lambda db: len(db.get_salary_statistics().rows),
+    'search_vacancies': lambda db: len(db.search_vacancies(SEARCH_QUERY).rows),
+    'get_vacancies_page': lambda db: len(db.get_vacancies_page(PAGE_SIZE)),
+    'iter_all_vacancies': lambda db: sum(1 for _ in db.iter_all_vacancies()),
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Returns a percentile of the values with linear interpolation between the closest ranks.
+    Args:
+        values (List[float]): The values, not necessarily sorted.
+        q (float): The percentile, from 0 to 100.
+    Returns:
+        float: The percentile.
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def measure(func: Callable[[], int], repeat: int) -> Dict[str, Any]:
+    """
+    Runs a function once to warm up, then `repeat` times timed, then once more under tracemalloc.
+    Args:
+        func (Callable[[], int]): The function to measure, returning the number of rows it processed.
+        repeat (int): The number of timed runs.
+    Returns:
+        Dict[str, Any]: The rows, the latency percentiles in milliseconds, the rows per second at the median
+                        latency and the peak Python memory in bytes.
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = func()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        func()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    median = percentile(timings, 50)
+    return {
+        'rows': rows,
+        'runs': repeat,
+        'latency_ms': {
+            'min': min(timings) * 1000,
+            'p50': median * 1000,
+            'p90': percentile(timings, 90) * 1000,
+            'p99': percentile(timings, 99) * 1000,
+            'max': max(timings) * 1000,
+        },
+        'rows_per_second': rows / median if median else None,
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def populate(conn, rows: int, employers: int) -> None:
+    """
+    Replaces the employers and vacancies with synthetic ones and refreshes the statistics.
+    A quarter of the vacancies has no salary and a tenth is archived.
+    Args:
+        conn: The connection to use.
+        rows (int): The number of vacancies.
+        employers (int): The number of employers.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("TRUNCATE vacancies, employers CASCADE")
+        cursor.execute("""
+        INSERT INTO employers (employer_id, employer_name, url)
+        SELECT i, 'Компания ' || i, 'https://hh.ru/employer/' || i
+        FROM generate_series(1, %s) AS i
+        """, (employers,))
+        cursor.execute("""
+        INSERT INTO vacancies (vacancy_id, employer_id, name, description, salary, url, published_at, archived,
+                               salary_from, salary_currency)
+        SELECT i, 1 + i %% %(employers)s, (%(titles)s)[1 + i %% cardinality(%(titles)s)] || ' ' || i,
+               'Требования к кандидату: опыт работы от ' || i %% 7 || ' лет', salary,
+               'https://hh.ru/vacancy/' || i, now() - (i %% 365) * interval '1 day', i %% 10 = 0, salary, 'RUR'
+        FROM generate_series(1, %(rows)s) AS i,
+             LATERAL (SELECT CASE WHEN i %% 4 <> 0 THEN 30000 + (hashtext(i::text) & 511) * 1000 END AS salary) s
+        """, {'employers': employers, 'rows': rows, 'titles': TITLES})
+        conn.commit()
+        cursor.execute("ANALYZE employers")
+        cursor.execute("ANALYZE vacancies")
+        conn.commit()
+    refresh_statistics()
+
+
+def generate_rows(first_id: int, count: int, employers: int) -> List[Tuple[Any, ...]]:
+    """
+    Generates synthetic vacancy rows in the order of VACANCY_COLUMNS.
+    Args:
+        first_id (int): The vacancy ID of the first row.
+        count (int): The number of rows.
+        employers (int): The number of existing employers.
+    Returns:
+        List[Tuple[Any, ...]]: The rows.
+    """
+    return [(
+        i, 1 + i % employers, f'{TITLES[i % len(TITLES)]} {i}', f'Требования к кандидату {i}',
+        30000 + i % 500 * 1000, f'https://hh.ru/vacancy/{i}', datetime.now(timezone.utc), False,
+        30000 + i % 500 * 1000, None, 'RUR', True,
+    ) for i in range(first_id, first_id + count)]
+
+
+def loader(conn, rows: List[Tuple[Any, ...]], method: str) -> Callable[[], int]:
+    """
+    Returns a function that upserts the rows with `bulk_upsert` and rolls the transaction back.
+    """
+    def load() -> int:
+        with conn.cursor() as cursor:
+            bulk_upsert(cursor, 'vacancies', VACANCY_COLUMNS, 'vacancy_id', rows, update=True, method=method)
+        conn.rollback()
+        return len(rows)
+    return load
+
+
+def snapshot_loader(conn, path: str) -> Callable[[], int]:
+    """
+    Returns a function that reads a snapshot, upserts its rows with `bulk_upsert` and rolls the transaction back.
+    """
+    def load() -> int:
+        loaded = 0
+        with conn.cursor() as cursor:
+            for table, columns, rows in iter_snapshot(path):
+                bulk_upsert(cursor, table, columns, SNAPSHOT_KEYS[table], rows, update=True)
+                loaded += len(rows)
+        conn.rollback()
+        return loaded
+    return load
+
+
+def run_scale(conn, rows: int, employers: int, load_rows: int, repeat: int,
+              snapshot: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Populates the database with one scale and measures every report method and loader.
+    Returns:
+        Dict[str, Any]: The scale and the measurements, see `measure`.
+    """
+    employers = min(employers, rows)
+    print(f'Генерация {rows} вакансий от {employers} работодателей...')
+    started = time.perf_counter()
+    populate(conn, rows, employers)
+    result: Dict[str, Any] = {'rows': rows, 'employers': employers,
+                              'populate_seconds': time.perf_counter() - started, 'reports': {}, 'loaders': {}}
+
+    with DBManager(DATABASE_CONFIG, use_cache=False) as db:
+        for name, report in REPORTS.items():
+            result['reports'][name] = stats = measure(lambda: report(db), repeat)
+            print(f'{name:>34}: p50 {stats["latency_ms"]["p50"]:10.1f} ms, '
+                  f'p99 {stats["latency_ms"]["p99"]:10.1f} ms, {stats["rows"]} rows')
+
+    load_rows = min(load_rows, rows)
+    upserted = generate_rows(rows - load_rows // 2 + 1, load_rows, employers)
+    for method in ('copy', 'values'):
+        result['loaders'][method] = stats = measure(loader(conn, upserted, method), repeat)
+        print(f'{method:>34}: p50 {stats["latency_ms"]["p50"]:10.1f} ms, '
+              f'{stats["rows_per_second"]:10.0f} rows/s')
+    if snapshot:
+        result['loaders']['snapshot'] = stats = measure(snapshot_loader(conn, snapshot), repeat)
+        print(f'{"snapshot":>34}: p50 {stats["latency_ms"]["p50"]:10.1f} ms, '
+              f'{stats["rows_per_second"]:10.0f} rows/s')
+    return result
+
+
+def run(scales: List[int], employers: int, load_rows: int, repeat: int, output: str,
+        snapshot: Optional[str] = None) -> None:
+    """
+    Runs the benchmark for every scale and writes the results as JSON.
+    Args:
+        scales (List[int]): The numbers of vacancies to generate.
+        employers (int): The maximum number of employers.
+        load_rows (int): The number of vacancies upserted by the loaders.
+        repeat (int): The number of timed runs of every method.
+        output (str): The path of the JSON file, '-' for the standard output.
+        snapshot (Optional[str]): The path of a snapshot whose replay is measured as well.
+    """
+    create_tables()
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SHOW server_version")
+            server_version = cursor.fetchone()[0]
+        conn.rollback()
+        results = {
+            'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'postgresql': server_version,
+            'repeat': repeat,
+            'snapshot': snapshot,
+            'scales': [run_scale(conn, rows, employers, load_rows, repeat, snapshot) for rows in scales],
+        }
+    finally:
+        conn.close()
+
+    if output == '-':
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+    else:
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+        print(f'Результаты записаны в {output}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[10000, 1000000, 10000000],
+                        help='numbers of vacancies to generate')
+    parser.add_argument('--employers', type=int, default=1000, help='maximum number of employers')
+    parser.add_argument('--load-rows', type=int, default=100000, help='number of vacancies upserted by the loaders')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timed runs of every method')
+    parser.add_argument('--output', default='bench_reports.json', help="JSON file for the results, '-' for stdout")
+    parser.add_argument('--snapshot', help='snapshot whose replay is measured as well')
+    args = parser.parse_args()
+    run(args.scales, args.employers, args.load_rows, args.repeat, args.output, args.snapshot)
@@ -0,0 +1,126 @@
+"""
+Checks with EXPLAIN that the report and synchronization queries on the vacancies table use its btree indexes.
+
+Usage:
+    python -m benchmarks.check_indexes --rows 200000
+
+The database from the .env file is migrated first. Synthetic employers and vacancies are inserted and analyzed
+inside a transaction that is rolled back at the end, so the stored data is not changed. The exit code is 1
+if a query does not use the expected index.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, List, Tuple
+
+import psycopg2
+
+from config import DATABASE_CONFIG
+from vacancy_db_manager.migrations import migrate
+
+EMPLOYERS_COUNT = 500
+SYNTHETIC_ID_OFFSET = 1000000000
+
+CHECKS: List[Tuple[str, str, str]] = [
+    ('first vacancies page', 'vacancies_salary_normalized_idx', """
+        SELECT e.employer_name, v.name, v.salary_normalized, v.url, v.vacancy_id
+        FROM vacancies v
+        JOIN employers e ON v.employer_id = e.employer_id
+        WHERE NOT v.archived AND v.salary_normalized IS NOT NULL
+        ORDER BY v.salary_normalized DESC, v.vacancy_id DESC
+        LIMIT 100
+    """),
+    ('next vacancies page', 'vacancies_salary_normalized_idx', """
+        SELECT e.employer_name, v.name, v.salary_normalized, v.url, v.vacancy_id
+        FROM vacancies v
+        JOIN employers e ON v.employer_id = e.employer_id
+        WHERE NOT v.archived AND v.salary_normalized IS NOT NULL
+          AND (v.salary_normalized, v.vacancy_id) < (150000, 1000100000)
+        ORDER BY v.salary_normalized DESC, v.vacancy_id DESC
+        LIMIT 100
+    """),
+    ('vacancies above a salary', 'vacancies_salary_normalized_idx', """
+        SELECT e.employer_name, v.name, v.salary_normalized, v.url
+        FROM vacancies v
+        JOIN employers e ON v.employer_id = e.employer_id
+        WHERE NOT v.archived AND v.salary_normalized > 520000
+    """),
+    ('archive vanished vacancies', 'vacancies_employer_id_idx', """
+        UPDATE vacancies SET archived = TRUE
+        WHERE employer_id = 1000000001 AND NOT archived AND vacancy_id <> ALL(ARRAY[1000000001])
+    """),
+    ('vacancy by ID', 'vacancies_pkey', """
+        SELECT archived FROM vacancies WHERE vacancy_id = 1000000001
+    """),
+]
+
+
+def iter_index_names(plan: Dict[str, Any]) -> Iterator[str]:
+    """
+    Yields the names of the indexes used by a plan node and its children.
+    Args:
+        plan (Dict[str, Any]): A plan node of EXPLAIN (FORMAT JSON).
+    Yields:
+        str: The index names.
+    """
+    if 'Index Name' in plan:
+        yield plan['Index Name']
+    for child in plan.get('Plans', []):
+        yield from iter_index_names(child)
+
+
+def seed(cursor, rows: int) -> None:
+    """
+    Inserts synthetic employers and vacancies with IDs above SYNTHETIC_ID_OFFSET and analyzes the tables.
+    Args:
+        cursor: The cursor to use.
+        rows (int): The number of vacancies to insert.
+    """
+    cursor.execute("""
+    INSERT INTO employers (employer_id, employer_name, url)
+    SELECT %(offset)s + i, 'Компания ' || i, 'https://hh.ru/employer/' || i
+    FROM generate_series(1, %(employers)s) AS i
+    """, {'offset': SYNTHETIC_ID_OFFSET, 'employers': EMPLOYERS_COUNT})
+    cursor.execute("""
+    INSERT INTO vacancies (vacancy_id, employer_id, name, description, salary, url, archived)
+    SELECT %(offset)s + i, %(offset)s + 1 + i %% %(employers)s, 'Вакансия ' || i, 'Требования ' || i,
+           CASE WHEN i %% 4 <> 0 THEN 30000 + i %% 500 * 1000 END, 'https://hh.ru/vacancy/' || i, i %% 10 = 0
+    FROM generate_series(1, %(rows)s) AS i
+    """, {'offset': SYNTHETIC_ID_OFFSET, 'employers': EMPLOYERS_COUNT, 'rows': rows})
+    cursor.execute("ANALYZE employers")
+    cursor.execute("ANALYZE vacancies")
+
+
+def run(rows: int) -> bool:
+    """
+    Seeds the database and prints whether every query of CHECKS uses its expected index.
+    Args:
+        rows (int): The number of synthetic vacancies.
+    Returns:
+        bool: True if every query uses its expected index.
+    """
+    migrate()
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    ok = True
+    try:
+        with conn.cursor() as cursor:
+            seed(cursor, rows)
+            for name, index, query in CHECKS:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {query}")
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                used = set(iter_index_names(plan[0]['Plan']))
+                passed = index in used
+                ok = ok and passed
+                print(f"{'OK' if passed else 'FAIL':>4}  {name}: expected {index}, used {sorted(used) or 'none'}")
+    finally:
+        conn.rollback()
+        conn.close()
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000, help='number of synthetic vacancies')
+    sys.exit(0 if run(parser.parse_args().rows) else 1)
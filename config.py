@@ -20,6 +20,48 @@ MASTER_DATABASE_CONFIG = {
     'port': os.getenv('DATABASE_PORT')
 }
 
+HH_API_URL = os.getenv('HH_API_URL', 'https://api.hh.ru')
+API_MAX_WORKERS = int(os.getenv('API_MAX_WORKERS', 8))
+API_REQUESTS_PER_SECOND = float(os.getenv('API_REQUESTS_PER_SECOND', 10))
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 5))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', 30))
+API_MAX_RETRIES = int(os.getenv('API_MAX_RETRIES', 5))
+API_BACKOFF_BASE = float(os.getenv('API_BACKOFF_BASE', 0.5))
+API_BACKOFF_MAX = float(os.getenv('API_BACKOFF_MAX', 30))
+API_BREAKER_THRESHOLD = int(os.getenv('API_BREAKER_THRESHOLD', 10))
+API_BREAKER_RESET_TIMEOUT = float(os.getenv('API_BREAKER_RESET_TIMEOUT', 60))
+
+HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', 'http_cache.sqlite')
+HTTP_CACHE_TTL = float(os.getenv('HTTP_CACHE_TTL', 0))
+HTTP_CACHE_MAX_SIZE_MB = float(os.getenv('HTTP_CACHE_MAX_SIZE_MB', 500))
+HTTP_CACHE_OFFLINE = os.getenv('HTTP_CACHE_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+BULK_LOAD_METHOD = os.getenv('BULK_LOAD_METHOD', 'copy')
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', 10000))
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 16))
+EMPLOYERS_FILE = os.getenv('EMPLOYERS_FILE')
+EXCHANGE_RATES_FILE = os.getenv('EXCHANGE_RATES_FILE')
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', os.cpu_count() or 1))
+
+FULL_SYNC_INTERVAL_HOURS = float(os.getenv('FULL_SYNC_INTERVAL_HOURS', 24))
+
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_IDLE_TIMEOUT = float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300))
+DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 30))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+
+DB_CURSOR_ITERSIZE = int(os.getenv('DB_CURSOR_ITERSIZE', 2000))
+REPORT_CHUNK_SIZE = int(os.getenv('REPORT_CHUNK_SIZE', 100))
+SEARCH_RESULTS_LIMIT = int(os.getenv('SEARCH_RESULTS_LIMIT', 100))
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', 64))
+RESULT_CACHE_MAX_ROWS = int(os.getenv('RESULT_CACHE_MAX_ROWS', 200000))
+
+METRICS_FILE = os.getenv('METRICS_FILE', '')
+METRICS_PREFIX = os.getenv('METRICS_PREFIX', 'vacancy_db')
+PROFILER = os.getenv('PROFILER', '').lower()
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+
 logging.basicConfig(
     filename='database_errors.log',
     level=logging.ERROR,
@@ -1,5 +1,9 @@
-from vacancy_db_manager.user_interactions import main_user_menu
+import sys
 
 
 if __name__ == '__main__':
-    main_user_menu()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        from vacancy_db_manager.cli import main
+        sys.exit(main())
+    from vacancy_db_manager.user_interactions import main_user_menu
+    main_user_menu()
@@ -1,89 +1,150 @@
-import requests
-import jmespath
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
+from config import HH_API_URL
+from vacancy_db_manager.http_client import FetchError, get_json, map_concurrently
+from vacancy_db_manager.parsers import parse_employer, parse_vacancy
 
-BASE_URL_EMPLOYERS = "https://api.hh.ru/employers"
-BASE_URL_VACANCIES = "https://api.hh.ru/vacancies"
+BASE_URL_EMPLOYERS = f"{HH_API_URL}/employers"
+BASE_URL_VACANCIES = f"{HH_API_URL}/vacancies"
+BASE_URL_DICTIONARIES = f"{HH_API_URL}/dictionaries"
+VACANCIES_PER_PAGE = 100
+SEARCH_DEPTH = 2000
 EMPLOYERS_ID = [1429999, 1035394, 3961360, 10772647, 84585, 5600787, 2180, 12550, 3529, 9498120]
 
 
-def get_employers() -> List[Dict[str, Any]]:
+def get_employer(company_id: int) -> Optional[Dict[str, Any]]:
     """
-    Fetches details for a list of predefined employers.
-    This function iterates through a predefined list of employer IDs, makes GET requests to fetch details
-    for each employer, and extracts specific fields using a JMESPath query. The extracted data is collected
-    into a list of dictionaries and returned.
+    Fetches details for a single employer.
+    Args:
+        company_id (int): The ID of the employer.
+    Returns:
+        Optional[Dict[str, Any]]: A dictionary with 'employer_id', 'employer_name' and 'url', or None if
+                                  the employer could not be fetched.
+    """
+    try:
+        data = get_json(f'{BASE_URL_EMPLOYERS}/{company_id}')
+    except FetchError:
+        return None
+    if data is None:
+        return None
+    return parse_employer(data)
+
+
+def get_employers(employer_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Fetches details for a list of employers.
+    Employers are fetched concurrently through the shared HTTP session, with the number of simultaneous
+    requests bounded by API_MAX_WORKERS and the request rate limited per host.
+    Args:
+        employer_ids (Optional[List[int]]): The IDs of the employers, EMPLOYERS_ID by default.
     Returns:
         List[Dict[str, Any]]: A list of dictionaries containing details about each employer. Each dictionary
                               includes 'employer_id', 'employer_name', and 'url'.
     """
-    employers_data = []
-    for company_id in EMPLOYERS_ID:
-        url = f'{BASE_URL_EMPLOYERS}/{company_id}'
-        response = requests.get(url=url)
-        if response.status_code == 200:
-            query = """
-            {
-                employer_id: id,
-                employer_name: name,
-                url: alternate_url
-            }
-            """
-            parsed_data = jmespath.search(query, response.json())
-            employers_data.append(parsed_data)
-    return employers_data
+    employers_data = map_concurrently(get_employer, EMPLOYERS_ID if employer_ids is None else employer_ids)
+    return [employer for employer in employers_data if employer is not None]
+
+
+def get_exchange_rates() -> Dict[str, float]:
+    """
+    Fetches the exchange rates of the currencies used in vacancies from the API dictionaries.
+    Returns:
+        Dict[str, float]: The amount of each currency per rouble by currency code ('RUR' is 1), or an empty
+                          dictionary if the dictionaries could not be fetched.
+    """
+    try:
+        data = get_json(BASE_URL_DICTIONARIES)
+    except FetchError:
+        return {}
+    if data is None:
+        return {}
+    return {currency['code']: currency['rate'] for currency in data.get('currency', []) if currency.get('rate')}
+
+
+def iter_raw_vacancy_pages(company_id: int, date_from: Optional[str] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Lazily fetches the vacancy items of a specific employer page by page, as returned by the API.
+    The next page is requested only after the previous one has been consumed, following the 'pages' field
+    of the API response, so memory use does not depend on the number of vacancies. Note that the API itself
+    does not return more than SEARCH_DEPTH vacancies for a single search.
+    Args:
+        company_id (int): The ID of the employer whose vacancies are to be fetched.
+        date_from (Optional[str]): If given, only vacancies published since this ISO 8601 date are fetched.
+    Yields:
+        List[Dict[str, Any]]: The vacancy items of one page.
+    Raises:
+        FetchError: If a page could not be fetched or a page after the first one was not found, so that an
+                    incomplete list is never mistaken for a complete one.
+    """
+    page = 0
+    pages = 1
+    while page < pages:
+        params = {'employer_id': company_id, 'per_page': VACANCIES_PER_PAGE, 'page': page,
+                  'only_with_salary': 'true'}
+        if date_from is not None:
+            params['date_from'] = date_from
+        data = get_json(BASE_URL_VACANCIES, params=params)
+        if data is None:
+            if page > 0:
+                raise FetchError(f"Страница {page} вакансий работодателя {company_id} не найдена")
+            return
+        pages = data.get('pages', 0)
+        yield data.get('items', [])
+        page += 1
+
+
+def iter_vacancy_pages(company_id: int, date_from: Optional[str] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Lazily fetches vacancies of a specific employer page by page, see `iter_raw_vacancy_pages`.
+    Args:
+        company_id (int): The ID of the employer whose vacancies are to be fetched.
+        date_from (Optional[str]): If given, only vacancies published since this ISO 8601 date are fetched.
+    Yields:
+        List[Dict[str, Any]]: The parsed vacancies of one page, see `parse_vacancy`.
+    """
+    for items in iter_raw_vacancy_pages(company_id, date_from):
+        yield [parse_vacancy(vac) for vac in items]
+
+
+def iter_vacancies(company_id: int, date_from: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily fetches all vacancies of a specific employer, yielding them as each page arrives.
+    Args:
+        company_id (int): The ID of the employer whose vacancies are to be fetched.
+        date_from (Optional[str]): If given, only vacancies published since this ISO 8601 date are fetched.
+    Yields:
+        Dict[str, Any]: A parsed vacancy, see `parse_vacancy`.
+    """
+    for page in iter_vacancy_pages(company_id, date_from):
+        yield from page
 
 
 def get_vacancies(company_id: int) -> List[Dict[str, Any]]:
     """
     Fetches vacancy details for a specific employer.
 
-    This function makes a GET request to fetch vacancies for a given employer ID. It extracts specific fields
-    from each vacancy using a JMESPath query, calculates the salary if 'from' and 'to' are present, and returns
-    a list of dictionaries containing details about each vacancy.
+    This function follows the pagination of the API and collects the vacancies of all pages returned by
+    `iter_vacancies` into a list.
     Args:
         company_id (int): The ID of the employer whose vacancies are to be fetched.
     Returns:
         List[Dict[str, Any]]: A list of dictionaries containing details about each vacancy. Each dictionary
                               includes 'vacancy_id', 'employer_id', 'name', 'description', 'salary', and 'url'.
     """
-    vacancies_data = []
-    url = f'{BASE_URL_VACANCIES}?employer_id={company_id}&per_page=100&only_with_salary=true'
-    response = requests.get(url=url)
-    if response.status_code == 200:
-        vacancies = response.json().get('items', [])
-        for vac in vacancies:
-            salary_from = vac.get('salary', {}).get('from')
-            salary_to = vac.get('salary', {}).get('to')
-            salary = salary_from if salary_from is not None else salary_to
-
-            query = """
-            {
-                vacancy_id: id,
-                employer_id: employer.id,
-                name: name,
-                description: snippet.requirement || '' && snippet.responsibility || '',
-                salary: salary,
-                url: alternate_url
-            }
-            """
-            parsed_data = jmespath.search(query, vac)
-            parsed_data['salary'] = salary
-            vacancies_data.append(parsed_data)
-    return vacancies_data
+    return list(iter_vacancies(company_id))
 
 
-def get_all_vacancies() -> List[Dict[str, Any]]:
+def get_all_vacancies(employer_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
     """
-    Fetches all vacancies for a predefined list of employer IDs.
-    This function iterates through a predefined list of employer IDs, fetches vacancies for each employer using
-    the `get_vacancies` function, and aggregates all vacancies into a single list.
+    Fetches all vacancies for a list of employer IDs.
+    Vacancies of different employers are fetched concurrently using the `get_vacancies` function, and
+    aggregated into a single list in the order of the employer IDs.
+    Args:
+        employer_ids (Optional[List[int]]): The IDs of the employers, EMPLOYERS_ID by default.
     Returns:
         List[Dict[str, Any]]: A list of all vacancies from all employers. Each dictionary includes 'vacancy_id',
                               'employer_id', 'name', 'description', 'salary', and 'url'.
     """
     vacancies_data = []
-    for company_id in EMPLOYERS_ID:
-        vacancies = get_vacancies(company_id)
+    for vacancies in map_concurrently(get_vacancies, EMPLOYERS_ID if employer_ids is None else employer_ids):
         vacancies_data.extend(vacancies)
     return vacancies_data
@@ -0,0 +1,232 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from config import (DB_CURSOR_ITERSIZE, DB_POOL_IDLE_TIMEOUT, DB_POOL_MAX_SIZE, DB_POOL_MIN_SIZE, DB_POOL_TIMEOUT,
+                    SEARCH_RESULTS_LIMIT, logger)
+from vacancy_db_manager.db_manager import (ALL_VACANCIES_QUERY, AVG_SALARY_QUERY, COMPANIES_QUERY, HIGHER_SALARY_QUERY,
+                                           KEYWORD_QUERY, SALARY_STATISTICS_QUERY, SEARCH_QUERY,
+                                           VACANCIES_PAGE_AFTER, VACANCIES_PAGE_QUERY, search_params)
+from vacancy_db_manager.metrics import increment, span
+from vacancy_db_manager.result_cache import get_result_cache
+
+try:
+    from psycopg.conninfo import make_conninfo
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:
+    AsyncConnectionPool = None
+
+_pools: Dict[Tuple[Tuple[str, Optional[str]], ...], 'AsyncConnectionPool'] = {}
+_pools_lock = asyncio.Lock()
+
+
+async def get_async_pool(config: Dict[str, str]) -> 'AsyncConnectionPool':
+    """
+    Returns the asynchronous connection pool for a database, creating and opening it on first use. The pool is
+    sized like the synchronous one, see `get_pool`, and belongs to the event loop it was created in.
+    Args:
+        config (Dict[str, str]): Database configuration parameters.
+    Returns:
+        AsyncConnectionPool: The pool.
+    Raises:
+        RuntimeError: If psycopg 3 and psycopg_pool are not installed.
+    """
+    if AsyncConnectionPool is None:
+        raise RuntimeError("Для AsyncDBManager требуются пакеты psycopg и psycopg_pool")
+    key = tuple(sorted(config.items()))
+    async with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = AsyncConnectionPool(make_conninfo('', **config), min_size=DB_POOL_MIN_SIZE,
+                                       max_size=DB_POOL_MAX_SIZE, timeout=DB_POOL_TIMEOUT,
+                                       max_idle=DB_POOL_IDLE_TIMEOUT, open=False)
+            await pool.open()
+            _pools[key] = pool
+        return pool
+
+
+async def close_async_pools() -> None:
+    """
+    Closes all asynchronous connection pools. Must be awaited before their event loop is closed.
+    """
+    async with _pools_lock:
+        for pool in _pools.values():
+            await pool.close()
+        _pools.clear()
+
+
+class AsyncDBManager:
+    def __init__(self, config: Dict[str, str], use_cache: bool = True) -> None:
+        """
+        Initializes the asyncio counterpart of DBManager, e.g. for a web service. It runs the same queries but
+        returns the rows instead of tables. Every query borrows a connection from the asynchronous pool only
+        for its duration, so one instance can serve many concurrent requests.
+        Args:
+            config (Dict[str, str]): Database configuration parameters.
+            use_cache (bool): Whether query results are shared through the process-wide result cache, which is
+                              also used by DBManager, see `_fetch`.
+        """
+        self.config = config
+        self.cache = get_result_cache() if use_cache else None
+
+    async def __aenter__(self) -> 'AsyncDBManager':
+        """
+        Opens the asynchronous pool of the database if needed and returns the AsyncDBManager instance.
+        Returns:
+            AsyncDBManager: The instance of the AsyncDBManager.
+        """
+        self.pool = await get_async_pool(self.config)
+        return self
+
+    async def __aexit__(self, exc_type: Optional[type], exc_val: Optional[Exception],
+                        exc_tb: Optional[Exception]) -> None:
+        """
+        Logs the error if the block raised one. The pool stays open for other instances.
+        Args:
+            exc_type (Optional[type]): The exception type.
+            exc_val (Optional[Exception]): The exception value.
+            exc_tb (Optional[Exception]): The traceback of the exception.
+        """
+        if exc_type is not None:
+            logger.error(f'Произошла ошибка {exc_type} {exc_val}')
+
+    async def get_data_version(self) -> int:
+        """
+        Reads the data version, which is bumped every time the statistics are refreshed after a load.
+        Returns:
+            int: The data version.
+        """
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute("SELECT version FROM data_version")
+            return (await cursor.fetchone())[0]
+
+    async def _fetch(self, name: str, query: str, params: Optional[Any] = None) -> List[Tuple[Any, ...]]:
+        """
+        Runs a query and returns all its rows. With the result cache enabled, the rows are reused until the
+        data version changes. The cache keys are the same as those of DBManager, so results computed by either
+        manager, e.g. by `precompute_reports`, serve both.
+        Args:
+            name (str): The name of the report, used in metrics and error messages.
+            query (str): The query.
+            params (Optional[Any]): The query parameters.
+        Returns:
+            List[Tuple[Any, ...]]: The rows. They must not be modified.
+        """
+        try:
+            with span('db_query', function=f'AsyncDBManager.{name}'):
+                if self.cache is not None:
+                    cache_params = tuple(sorted(params.items())) if isinstance(params, dict) else params
+                    key = (tuple(sorted(self.config.items())), query, cache_params)
+                    version = await self.get_data_version()
+                    rows = self.cache.get(key, version)
+                    if rows is not None:
+                        increment('result_cache_lookups', result='hit')
+                        return rows
+                    increment('result_cache_lookups', result='miss')
+                async with self.pool.connection() as conn:
+                    cursor = await conn.execute(query, params)
+                    rows = await cursor.fetchall()
+                if self.cache is not None:
+                    self.cache.put(key, version, rows)
+                return rows
+        except Exception as e:
+            logger.error(f"Ошибка при выполнении запроса {name}: {e}")
+            raise
+
+    async def get_companies_and_vacancies_count(self) -> List[Tuple[Any, ...]]:
+        """
+        Retrieves all companies and the number of vacancies each company has, see
+        `DBManager.get_companies_and_vacancies_count`.
+        Returns:
+            List[Tuple[Any, ...]]: The company name and the count of vacancies.
+        """
+        return await self._fetch('get_companies_and_vacancies_count', COMPANIES_QUERY)
+
+    async def get_all_vacancies(self) -> List[Tuple[Any, ...]]:
+        """
+        Retrieves all vacancies, see `DBManager.get_all_vacancies`.
+        Returns:
+            List[Tuple[Any, ...]]: The company name, vacancy name, salary in roubles and URL.
+        """
+        return await self._fetch('get_all_vacancies', ALL_VACANCIES_QUERY)
+
+    async def iter_all_vacancies(self, itersize: int = DB_CURSOR_ITERSIZE) -> AsyncIterator[Tuple[Any, ...]]:
+        """
+        Streams the rows of `get_all_vacancies` through a server-side cursor, see
+        `DBManager.iter_all_vacancies`. The connection is held until the iteration ends.
+        Args:
+            itersize (int): The number of rows fetched per round trip.
+        Yields:
+            Tuple[Any, ...]: The company name, vacancy name, salary and URL.
+        """
+        try:
+            async with self.pool.connection() as conn, conn.cursor(name='all_vacancies') as cursor:
+                cursor.itersize = itersize
+                await cursor.execute(ALL_VACANCIES_QUERY)
+                async for row in cursor:
+                    yield row
+        except Exception as e:
+            logger.error(f"Ошибка при получении вакансий: {e}")
+            raise
+
+    async def get_vacancies_page(self, limit: int,
+                                 after: Optional[Tuple[int, int]] = None) -> List[Tuple[Any, ...]]:
+        """
+        Retrieves one page of vacancies using keyset pagination, see `DBManager.get_vacancies_page`.
+        Args:
+            limit (int): The maximum number of rows in the page.
+            after (Optional[Tuple[int, int]]): The salary and vacancy ID of the last row of the previous page,
+                                               None for the first page.
+        Returns:
+            List[Tuple[Any, ...]]: The company name, vacancy name, salary, URL and vacancy ID of each vacancy.
+        """
+        query = VACANCIES_PAGE_QUERY.format(VACANCIES_PAGE_AFTER if after is not None else '')
+        params = (*after, limit) if after is not None else (limit,)
+        return await self._fetch('get_vacancies_page', query, params)
+
+    async def get_avg_salary(self) -> List[Tuple[Any, ...]]:
+        """
+        Retrieves the average salary of all vacancies, see `DBManager.get_avg_salary`.
+        Returns:
+            List[Tuple[Any, ...]]: One row with the average salary.
+        """
+        return await self._fetch('get_avg_salary', AVG_SALARY_QUERY)
+
+    async def get_vacancies_with_higher_salary(self) -> List[Tuple[Any, ...]]:
+        """
+        Retrieves the vacancies with a salary higher than the average, see
+        `DBManager.get_vacancies_with_higher_salary`.
+        Returns:
+            List[Tuple[Any, ...]]: The company name, vacancy name, salary and URL.
+        """
+        return await self._fetch('get_vacancies_with_higher_salary', HIGHER_SALARY_QUERY)
+
+    async def get_salary_statistics(self) -> List[Tuple[Any, ...]]:
+        """
+        Retrieves the salary distribution of each company, see `DBManager.get_salary_statistics`.
+        Returns:
+            List[Tuple[Any, ...]]: The company name, the count of vacancies and the average, median, 25th, 75th
+                                   and 90th percentile salary.
+        """
+        return await self._fetch('get_salary_statistics', SALARY_STATISTICS_QUERY)
+
+    async def get_vacancies_with_keyword(self, keyword: str) -> List[Tuple[Any, ...]]:
+        """
+        Retrieves the vacancies whose title or description contains a keyword, see
+        `DBManager.get_vacancies_with_keyword`.
+        Args:
+            keyword (str): The keyword to search for.
+        Returns:
+            List[Tuple[Any, ...]]: The job title, salary and URL.
+        """
+        return await self._fetch('get_vacancies_with_keyword', KEYWORD_QUERY, (f'%{keyword}%', f'%{keyword}%'))
+
+    async def search_vacancies(self, search_query: str, limit: int = SEARCH_RESULTS_LIMIT) -> List[Tuple[Any, ...]]:
+        """
+        Searches vacancies by one or more words ranked by relevance, see `DBManager.search_vacancies`.
+        Args:
+            search_query (str): The words to search for.
+            limit (int): The maximum number of vacancies to return.
+        Returns:
+            List[Tuple[Any, ...]]: The job title, salary and URL, the most relevant first.
+        """
+        return await self._fetch('search_vacancies', SEARCH_QUERY, search_params(search_query, limit))
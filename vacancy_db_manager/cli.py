@@ -0,0 +1,213 @@
+"""
+Non-interactive command line interface, e.g. for cron:
+
+    python main.py sync [--full] [--rebuild] [--workers N] [--employers-file PATH]
+    python main.py load --from-file vacancies.jsonl
+    python main.py snapshot export snapshot.jsonl.zst
+    python main.py snapshot load snapshot.jsonl.zst
+    python main.py report companies --format csv --output companies.csv
+    python main.py search "python разработчик" --format json
+
+Modules are imported by the command that needs them, so the report and search commands start without importing
+the HTTP client or touching the network.
+"""
+import argparse
+import sys
+from typing import Any, Iterable, List, Optional, Sequence
+
+from config import logger
+
+REPORTS = {
+    'companies': ('get_companies_and_vacancies_count', ('employer_name', 'vacancies_count')),
+    'vacancies': ('iter_all_vacancies', ('employer_name', 'name', 'salary', 'url')),
+    'avg-salary': ('get_avg_salary', ('avg_salary',)),
+    'higher-salary': ('get_vacancies_with_higher_salary', ('employer_name', 'name', 'salary', 'url')),
+    'salary-stats': ('get_salary_statistics', ('employer_name', 'vacancies_count', 'avg_salary', 'median_salary',
+                                               'p25_salary', 'p75_salary', 'p90_salary')),
+}
+SEARCH_COLUMNS = ('name', 'salary', 'url')
+FORMATS = ('table', 'csv', 'json', 'jsonl')
+
+
+def write_rows(rows: Iterable[Sequence[Any]], columns: Sequence[str], output_format: str,
+               output: Optional[str]) -> int:
+    """
+    Writes rows to a file or the standard output in the given format.
+    Args:
+        rows (Iterable[Sequence[Any]]): The rows to write.
+        columns (Sequence[str]): The column names.
+        output_format (str): 'table', 'csv', 'json' or 'jsonl'.
+        output (Optional[str]): The path of the file, None for the standard output.
+    Returns:
+        int: The number of rows written.
+    """
+    from vacancy_db_manager.exporters import iter_tables, write_csv, write_json, write_jsonl
+    from config import REPORT_CHUNK_SIZE
+
+    fp = open(output, 'w', encoding='utf-8', newline='') if output else sys.stdout
+    try:
+        if output_format == 'table':
+            count = 0
+            for table in iter_tables(rows, columns, REPORT_CHUNK_SIZE):
+                print(table, file=fp)
+                count += len(table.rows)
+            return count
+        writer = {'csv': write_csv, 'json': write_json, 'jsonl': write_jsonl}[output_format]
+        return writer(rows, columns, fp)
+    finally:
+        if output:
+            fp.close()
+
+
+def command_sync(args: argparse.Namespace) -> int:
+    """
+    Synchronizes the database with the API, see `sync_database` and `run_sharded_sync`.
+    """
+    from vacancy_db_manager.employers import load_employer_ids
+
+    employer_ids = load_employer_ids(args.employers_file) if args.employers_file else None
+    if args.workers > 1:
+        from vacancy_db_manager.sharding import run_sharded_sync
+        run_sharded_sync(args.workers, employer_ids, args.full, args.rebuild)
+    else:
+        from vacancy_db_manager.sync import sync_database
+        sync_database(employer_ids, args.full, args.rebuild)
+
+    from vacancy_db_manager.http_client import get_failure_report
+    return 1 if get_failure_report() else 0
+
+
+def command_load(args: argparse.Namespace) -> int:
+    """
+    Loads vacancies from a file without touching the API, see `load_vacancies_file`.
+    """
+    import os
+    from vacancy_db_manager.db_creator import create_tables, ensure_database, format_upsert_counts, get_upsert_counts
+    from vacancy_db_manager.file_loader import load_vacancies_file
+
+    ensure_database(os.getenv('DATABASE_NAME'))
+    create_tables()
+    loaded = load_vacancies_file(args.from_file, update=not args.no_update)
+    print(f"Загружено {loaded} вакансий из {args.from_file}: {format_upsert_counts(get_upsert_counts('vacancies'))}",
+          file=sys.stderr)
+    return 0
+
+
+def command_snapshot(args: argparse.Namespace) -> int:
+    """
+    Exports the data fetched from the API to a snapshot or loads a snapshot, see `export_snapshot` and
+    `load_snapshot`. Like `command_sync`, export fails with code 1 if some API requests could not be completed.
+    """
+    if args.action == 'export':
+        from vacancy_db_manager.employers import load_employer_ids
+        from vacancy_db_manager.http_client import get_failure_report
+        from vacancy_db_manager.snapshots import export_snapshot
+        from vacancy_db_manager.sync import print_failure_report
+
+        counts = export_snapshot(args.path, load_employer_ids(args.employers_file))
+        print(f"Сохранено {counts['employers']} работодателей и {counts['vacancies']} вакансий в {args.path}",
+              file=sys.stderr)
+        print_failure_report()
+        return 1 if get_failure_report() else 0
+
+    import os
+    from vacancy_db_manager.db_creator import create_tables, ensure_database, format_upsert_counts, get_upsert_counts
+    from vacancy_db_manager.snapshots import load_snapshot
+
+    ensure_database(os.getenv('DATABASE_NAME'))
+    create_tables()
+    counts = load_snapshot(args.path, update=not args.no_update)
+    print(f"Загружено {counts['employers']} работодателей и {counts['vacancies']} вакансий из {args.path}: "
+          f"{format_upsert_counts(get_upsert_counts('vacancies'))}", file=sys.stderr)
+    return 0
+
+
+def command_report(args: argparse.Namespace) -> int:
+    """
+    Writes one of the REPORTS.
+    """
+    from config import DATABASE_CONFIG
+    from vacancy_db_manager.db_manager import DBManager
+
+    method, columns = REPORTS[args.name]
+    with DBManager(DATABASE_CONFIG) as db_manager:
+        result = getattr(db_manager, method)()
+        rows = result if args.name == 'vacancies' else result.rows
+        write_rows(rows, columns, args.format, args.output)
+    return 0
+
+
+def command_search(args: argparse.Namespace) -> int:
+    """
+    Writes the vacancies matching a search query, see `DBManager.search_vacancies`.
+    """
+    from config import DATABASE_CONFIG
+    from vacancy_db_manager.db_manager import DBManager
+
+    with DBManager(DATABASE_CONFIG) as db_manager:
+        table = db_manager.search_vacancies(args.query, args.limit)
+        write_rows(table.rows, SEARCH_COLUMNS, args.format, args.output)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the argument parser with a subcommand for every command.
+    Returns:
+        argparse.ArgumentParser: The parser.
+    """
+    from config import INGEST_WORKERS, SEARCH_RESULTS_LIMIT
+
+    parser = argparse.ArgumentParser(prog='main.py', description='Загрузка вакансий hh.ru и отчёты по ним.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sync = subparsers.add_parser('sync', help='синхронизировать базу данных с API')
+    sync.add_argument('--full', action='store_true', help='полная синхронизация всех работодателей')
+    sync.add_argument('--rebuild', action='store_true', help='пересоздать базу данных')
+    sync.add_argument('--workers', type=int, default=1,
+                      help=f'число процессов-шардов (например, {INGEST_WORKERS})')
+    sync.add_argument('--employers-file', help='файл со списком ID работодателей')
+    sync.set_defaults(handler=command_sync)
+
+    load = subparsers.add_parser('load', help='загрузить вакансии из файла без обращения к API')
+    load.add_argument('--from-file', required=True, help='JSON или JSON Lines с вакансиями в формате API')
+    load.add_argument('--no-update', action='store_true', help='не обновлять уже сохранённые вакансии')
+    load.set_defaults(handler=command_load)
+
+    snapshot = subparsers.add_parser('snapshot', help='сохранить данные API в снимок или загрузить снимок')
+    snapshot.add_argument('action', choices=('export', 'load'), help='действие')
+    snapshot.add_argument('path', help='файл снимка: .jsonl, .jsonl.gz или .jsonl.zst')
+    snapshot.add_argument('--employers-file', help='файл со списком ID работодателей для export')
+    snapshot.add_argument('--no-update', action='store_true', help='не обновлять уже сохранённые данные при load')
+    snapshot.set_defaults(handler=command_snapshot)
+
+    report = subparsers.add_parser('report', help='вывести отчёт')
+    report.add_argument('name', choices=sorted(REPORTS), help='название отчёта')
+    report.add_argument('--format', choices=FORMATS, default='table', help='формат вывода')
+    report.add_argument('--output', help='файл для записи, по умолчанию стандартный вывод')
+    report.set_defaults(handler=command_report)
+
+    search = subparsers.add_parser('search', help='найти вакансии по словам')
+    search.add_argument('query', help='слова для поиска')
+    search.add_argument('--limit', type=int, default=SEARCH_RESULTS_LIMIT, help='максимальное число вакансий')
+    search.add_argument('--format', choices=FORMATS, default='table', help='формат вывода')
+    search.add_argument('--output', help='файл для записи, по умолчанию стандартный вывод')
+    search.set_defaults(handler=command_search)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Runs the command given on the command line.
+    Args:
+        argv (Optional[List[str]]): The arguments without the program name, sys.argv[1:] by default.
+    Returns:
+        int: The exit code: 0 on success, 1 if the command failed or some API requests could not be completed.
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except Exception as e:
+        logger.error(f"Ошибка при выполнении команды {args.command}: {e}")
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
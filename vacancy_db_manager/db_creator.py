@@ -1,39 +1,38 @@
+import hashlib
+import io
+import json
+from itertools import islice
 import psycopg2
 from psycopg2 import sql
-from config import DATABASE_CONFIG, MASTER_DATABASE_CONFIG, logger
-from typing import List, Dict, Optional, Any
-
-CREATE_TABLES_QUERIES = [
-    """
-    CREATE TABLE IF NOT EXISTS employers (
-        employer_id INTEGER PRIMARY KEY,
-        employer_name VARCHAR(250) NOT NULL,
-        url TEXT NOT NULL
-    );
-    """,
-    """
-    CREATE TABLE IF NOT EXISTS vacancies (
-        id SERIAL PRIMARY KEY,
-        vacancy_id INTEGER NOT NULL UNIQUE,
-        employer_id INTEGER NOT NULL,
-        name VARCHAR(255) NOT NULL,
-        description TEXT,
-        salary INTEGER,
-        url TEXT NOT NULL,
-        FOREIGN KEY (employer_id) REFERENCES employers (employer_id) ON DELETE CASCADE
-    );
-    """
+from psycopg2.extras import execute_values
+from vacancy_db_manager.db_pool import close_pools, get_pool
+from vacancy_db_manager.metrics import get_metrics, increment, span, timed
+from vacancy_db_manager.migrations import migrate
+from vacancy_db_manager.parsers import EMPLOYER_FIELDS, VACANCY_FIELDS
+from config import MASTER_DATABASE_CONFIG, BULK_BATCH_SIZE, BULK_LOAD_METHOD, logger
+from typing import List, Dict, Optional, Any, Iterable, Iterator, Sequence, Tuple
+
+EMPLOYER_COLUMNS = EMPLOYER_FIELDS
+VACANCY_COLUMNS = VACANCY_FIELDS
+CONTENT_HASH_COLUMNS = {'vacancies': 'content_hash'}
+
+REFRESH_STATISTICS_QUERIES = [
+    "REFRESH MATERIALIZED VIEW CONCURRENTLY employer_stats;",
+    "REFRESH MATERIALIZED VIEW CONCURRENTLY salary_stats;",
 ]
+BUMP_DATA_VERSION_QUERY = "UPDATE data_version SET version = version + 1, updated_at = now();"
 
 
 def create_database(dbname: str) -> None:
     """
     Connects to the PostgreSQL server and creates a new database, dropping it first if it exists.
+    Idle pooled connections are closed first so they do not prevent the database from being dropped.
     Args:
         dbname (str): The name of the database to create.
     Returns:
         None
     """
+    close_pools()
     conn = psycopg2.connect(**MASTER_DATABASE_CONFIG)
     conn.autocommit = True
     cursor = conn.cursor()
@@ -49,47 +48,318 @@ def create_database(dbname: str) -> None:
         conn.close()
 
 
+def ensure_database(dbname: str) -> bool:
+    """
+    Connects to the PostgreSQL server and creates the database only if it does not exist yet.
+    Args:
+        dbname (str): The name of the database.
+    Returns:
+        bool: True if the database has been created, False if it already existed.
+    """
+    conn = psycopg2.connect(**MASTER_DATABASE_CONFIG)
+    conn.autocommit = True
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (dbname,))
+        if cursor.fetchone() is not None:
+            return False
+        cursor.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(dbname)))
+        print(f"База данных '{dbname}' успешно создана")
+        return True
+    except Exception as e:
+        logger.error(f"Ошибка при создании базы данных: {e}")
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
 def create_tables() -> None:
     """
-    Connects to the PostgreSQL database and creates the employers and vacancies tables if they do not exist.
+    Connects to the PostgreSQL database and creates or upgrades its tables by applying the pending schema
+    migrations, see `migrate`.
+    Returns:
+        None
+    """
+    try:
+        applied = migrate()
+        print("Таблицы успешно созданы" if applied else "Схема базы данных актуальна")
+    except Exception as e:
+        logger.error(f"Ошибка при создании таблиц: {e}")
+
+
+def bump_data_version() -> None:
+    """
+    Increments the data version in its own transaction, which invalidates the cached report results.
     Returns:
         None
     """
-    conn = psycopg2.connect(**DATABASE_CONFIG)
+    conn = get_pool().getconn()
     cursor = conn.cursor()
 
     try:
-        for query in CREATE_TABLES_QUERIES:
+        cursor.execute(BUMP_DATA_VERSION_QUERY)
+        conn.commit()
+    except Exception as e:
+        logger.error(f"Ошибка при обновлении версии данных: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        get_pool().putconn(conn)
+
+
+@timed('refresh_statistics')
+def refresh_statistics() -> None:
+    """
+    Recomputes the materialized salary and vacancy count statistics read by DBManager.
+    The views are refreshed concurrently, so reports keep reading the previous statistics meanwhile. Afterwards the
+    data version is bumped in a separate transaction, so the cached report results are invalidated after every
+    load even if the refresh failed.
+    Returns:
+        None
+    """
+    conn = get_pool().getconn()
+    cursor = conn.cursor()
+
+    try:
+        for query in REFRESH_STATISTICS_QUERIES:
             cursor.execute(query)
         conn.commit()
-        print("Таблицы успешно созданы")
     except Exception as e:
-        logger.error(f"Ошибка при создании таблиц: {e}")
+        logger.error(f"Ошибка при обновлении статистики: {e}")
         conn.rollback()
     finally:
         cursor.close()
-        conn.close()
+        get_pool().putconn(conn)
+    bump_data_version()
 
 
-def insert_employers(employers: List[Dict[str, Optional[str]]]) -> None:
+def _copy_value(value: Any) -> str:
     """
-    Inserts employers into the database.
+    Formats a value for the text format of COPY.
     Args:
-        employers (List[Dict[str, Optional[str]]]): A list of dictionaries where each dictionary contains
-                                                   'employer_id', 'employer_name', and 'url' for an employer.
+        value (Any): The value to format.
+    Returns:
+        str: The escaped value, or the NULL marker for None.
+    """
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> None:
+    """
+    Streams rows into a table with COPY FROM STDIN, sending them in chunks of BULK_BATCH_SIZE rows.
+    Args:
+        cursor: The cursor to use.
+        table (str): The name of the target table.
+        columns (Sequence[str]): The columns of the target table, in the order of the row values.
+        rows (Iterable[Sequence[Any]]): The rows to load.
     Returns:
         None
     """
-    conn = psycopg2.connect(**DATABASE_CONFIG)
+    query = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table), sql.SQL(', ').join(map(sql.Identifier, columns))).as_string(cursor)
+    for batch in _batched(rows, BULK_BATCH_SIZE):
+        buffer = io.StringIO()
+        for row in batch:
+            buffer.write('\t'.join(_copy_value(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        cursor.copy_expert(query, buffer)
+
+
+def _batched(rows: Iterable[Sequence[Any]], size: int) -> Iterator[List[Sequence[Any]]]:
+    """
+    Splits rows into lists of at most `size` rows.
+    Args:
+        rows (Iterable[Sequence[Any]]): The rows to split.
+        size (int): The maximum size of a batch.
+    Yields:
+        List[Sequence[Any]]: The next batch of rows.
+    """
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def content_hash(row: Sequence[Any]) -> int:
+    """
+    Computes the content hash of a row, used to detect whether a stored row has changed.
+    Args:
+        row (Sequence[Any]): The row values.
+    Returns:
+        int: A 64-bit BLAKE2b digest of the values as a signed integer that fits a BIGINT column.
+    """
+    data = json.dumps(list(row), ensure_ascii=False, separators=(',', ':'), default=str).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big', signed=True)
+
+
+def _counted(rows: Iterable[Sequence[Any]], counts: Dict[str, int]) -> Iterator[Sequence[Any]]:
+    """
+    Yields the rows, counting them in counts['total'].
+    """
+    for row in rows:
+        counts['total'] += 1
+        yield row
+
+
+def _changed_rows(cursor, table: str, key: str, key_index: int, hash_column: str,
+                  rows: Iterable[Sequence[Any]], counts: Dict[str, int]) -> Iterator[Tuple[Any, ...]]:
+    """
+    Appends the content hash to every row and skips the rows whose stored hash is the same, looking the stored
+    hashes up by key one batch of BULK_BATCH_SIZE rows at a time. When a key occurs several times in a batch,
+    the last row wins.
+    Yields:
+        Tuple[Any, ...]: The new and changed rows with their content hash.
+    """
+    hash_query = sql.SQL("SELECT {0}, {1} FROM {2} WHERE {0} = ANY(%s)").format(
+        sql.Identifier(key), sql.Identifier(hash_column), sql.Identifier(table))
+    for batch in _batched(rows, BULK_BATCH_SIZE):
+        hashed = {row[key_index]: (*row, content_hash(row)) for row in batch}
+        counts['total'] += len(hashed)
+        cursor.execute(hash_query, (list(hashed),))
+        for row_key, stored_hash in cursor.fetchall():
+            if hashed[row_key][-1] == stored_hash:
+                del hashed[row_key]
+        yield from hashed.values()
+
+
+def bulk_upsert(cursor, table: str, columns: Sequence[str], key: str, rows: Iterable[Sequence[Any]],
+                update: bool = False, method: str = BULK_LOAD_METHOD) -> Dict[str, int]:
+    """
+    Loads rows into a table in bulk, skipping or updating rows whose key already exists.
+
+    With the 'copy' method rows are streamed with COPY FROM STDIN into a temporary staging table and then
+    merged into the target table with a single INSERT ... ON CONFLICT; when a key occurs several times, the
+    last row wins. The 'values' method sends batched multi-row INSERT statements with execute_values instead,
+    for servers where COPY is not available.
+
+    For the tables of CONTENT_HASH_COLUMNS the content hash of every row is stored alongside it. Rows whose
+    stored hash is the same are skipped before being sent, and existing rows are only updated when their
+    hash differs, so repeated loads of the same data do not rewrite the rows.
+    Args:
+        cursor: The cursor to use. The caller is responsible for committing the transaction.
+        table (str): The name of the target table.
+        columns (Sequence[str]): The columns to load, in the order of the row values.
+        key (str): The unique column used to detect conflicts.
+        rows (Iterable[Sequence[Any]]): The rows to load.
+        update (bool): Whether existing rows are updated (DO UPDATE) instead of being left as is (DO NOTHING).
+        method (str): 'copy' or 'values'.
+    Returns:
+        Dict[str, int]: The number of 'inserted', 'updated' and 'unchanged' rows.
+    """
+    key_index = list(columns).index(key)
+    counts = {'total': 0}
+    hash_column = CONTENT_HASH_COLUMNS.get(table)
+    if hash_column is not None and hash_column not in columns:
+        rows = _changed_rows(cursor, table, key, key_index, hash_column, rows, counts)
+        columns = (*columns, hash_column)
+    else:
+        hash_column = None
+        rows = _counted(rows, counts)
+
+    column_list = sql.SQL(', ').join(map(sql.Identifier, columns))
+    if update:
+        on_conflict = sql.SQL("ON CONFLICT ({}) DO UPDATE SET {}").format(
+            sql.Identifier(key),
+            sql.SQL(', ').join(sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(column))
+                               for column in columns if column != key))
+        if hash_column is not None:
+            on_conflict = sql.SQL("{} WHERE {}.{} IS DISTINCT FROM EXCLUDED.{}").format(
+                on_conflict, sql.Identifier(table), sql.Identifier(hash_column), sql.Identifier(hash_column))
+    else:
+        on_conflict = sql.SQL("ON CONFLICT ({}) DO NOTHING").format(sql.Identifier(key))
+
+    with span('bulk_upsert', table=table, method=method):
+        if method == 'copy':
+            staging = f'{table}_staging'
+            cursor.execute(sql.SQL("CREATE TEMP TABLE IF NOT EXISTS {} ON COMMIT DROP AS "
+                                   "SELECT {} FROM {} WITH NO DATA").format(
+                sql.Identifier(staging), column_list, sql.Identifier(table)))
+            _copy_rows(cursor, staging, columns, rows)
+            cursor.execute(sql.SQL("INSERT INTO {} ({}) SELECT DISTINCT ON ({}) {} FROM {} "
+                                   "ORDER BY {}, ctid DESC {} RETURNING (xmax = 0)").format(
+                sql.Identifier(table), column_list, sql.Identifier(key), column_list, sql.Identifier(staging),
+                sql.Identifier(key), on_conflict))
+            written = [inserted for inserted, in cursor.fetchall()]
+            cursor.execute(sql.SQL("TRUNCATE {}").format(sql.Identifier(staging)))
+        elif method == 'values':
+            query = sql.SQL("INSERT INTO {} ({}) VALUES %s {} RETURNING (xmax = 0)").format(
+                sql.Identifier(table), column_list, on_conflict).as_string(cursor)
+            written = []
+            for batch in _batched(rows, BULK_BATCH_SIZE):
+                unique_rows = list({row[key_index]: row for row in batch}.values())
+                written.extend(inserted for inserted, in execute_values(cursor, query, unique_rows,
+                                                                        page_size=len(unique_rows), fetch=True))
+        else:
+            raise ValueError(f"Неизвестный способ загрузки: {method}")
+
+    inserted = sum(written)
+    result = {'inserted': inserted, 'updated': len(written) - inserted,
+              'unchanged': max(counts['total'] - len(written), 0)}
+    for name, value in result.items():
+        increment('rows_upserted', value, table=table, result=name)
+    return result
+
+
+def get_upsert_counts(table: str, since: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """
+    Returns the number of rows inserted, updated and left unchanged by `bulk_upsert` in this process,
+    including the merged metrics of worker processes.
+    Args:
+        table (str): The name of the table.
+        since (Optional[Dict[str, int]]): Earlier counts to subtract, to get the counts of one load.
+    Returns:
+        Dict[str, int]: The number of 'inserted', 'updated' and 'unchanged' rows.
+    """
+    counters = get_metrics()['counters']
+    counts = {result: int(counters.get(('rows_upserted', (('result', result), ('table', table))), 0))
+              for result in ('inserted', 'updated', 'unchanged')}
+    if since is not None:
+        counts = {result: value - since.get(result, 0) for result, value in counts.items()}
+    return counts
+
+
+def format_upsert_counts(counts: Dict[str, int]) -> str:
+    """
+    Formats the counts returned by `bulk_upsert` or `get_upsert_counts` for a message.
+    """
+    return f"новых {counts['inserted']}, изменённых {counts['updated']}, без изменений {counts['unchanged']}"
+
+
+def vacancy_rows(vacancies: Iterable[Dict[str, Optional[Any]]]) -> Iterator[tuple]:
+    """
+    Converts parsed vacancies into rows in the order of VACANCY_COLUMNS.
+    Args:
+        vacancies (Iterable[Dict[str, Optional[Any]]]): The parsed vacancies.
+    Yields:
+        tuple: The row of a vacancy.
+    """
+    for vac in vacancies:
+        yield (vac['vacancy_id'], vac['employer_id'], vac['name'], vac.get('description'), vac.get('salary'),
+               vac['url'], vac.get('published_at'), vac.get('archived') or False, vac.get('salary_from'),
+               vac.get('salary_to'), vac.get('salary_currency'), vac.get('salary_gross'))
+
+
+def insert_employers(employers: Iterable[Dict[str, Optional[str]]], update: bool = False) -> None:
+    """
+    Inserts employers into the database in bulk.
+    Args:
+        employers (Iterable[Dict[str, Optional[str]]]): Dictionaries where each dictionary contains
+                                                       'employer_id', 'employer_name', and 'url' for an employer.
+        update (bool): Whether already stored employers are updated.
+    Returns:
+        None
+    """
+    conn = get_pool().getconn()
     cursor = conn.cursor()
 
     try:
-        for emp in employers:
-            cursor.execute(
-                sql.SQL("INSERT INTO employers (employer_id, employer_name, url) "
-                        "VALUES (%s, %s, %s) ON CONFLICT (employer_id) DO NOTHING;"),
-                (emp['employer_id'], emp['employer_name'], emp['url'])
-            )
+        rows = ((emp['employer_id'], emp['employer_name'], emp['url']) for emp in employers)
+        bulk_upsert(cursor, 'employers', EMPLOYER_COLUMNS, 'employer_id', rows, update=update)
         conn.commit()
         print("Данные о работодателях успешно заполнены")
     except Exception as e:
@@ -97,36 +367,40 @@ def insert_employers(employers: List[Dict[str, Optional[str]]]) -> None:
         conn.rollback()
     finally:
         cursor.close()
-        conn.close()
+        get_pool().putconn(conn)
 
 
-def insert_vacancies(vacancies: List[Dict[str, Optional[Any]]]) -> None:
+def insert_vacancies(vacancies: Iterable[Dict[str, Optional[Any]]], update: bool = True,
+                     refresh: bool = True) -> None:
     """
-    Inserts vacancies into the database.
+    Inserts vacancies into the database in bulk.
     Args:
-        vacancies (List[Dict[str, Optional[Any]]]): A list of dictionaries where each dictionary contains
-                                                   'vacancy_id', 'employer_id', 'name', 'description',
-                                                   'salary', and 'url' for a vacancy.
+        vacancies (Iterable[Dict[str, Optional[Any]]]): Dictionaries where each dictionary contains
+                                                       'vacancy_id', 'employer_id', 'name', 'description',
+                                                       'salary', and 'url' for a vacancy, and optionally
+                                                       'published_at', 'archived' and the salary range
+                                                       fields, see `parse_vacancy`. The salary in roubles
+                                                       is computed by the database from exchange_rates.
+        update (bool): Whether already stored vacancies are updated. Only vacancies whose content has changed
+                       are rewritten, see `bulk_upsert`.
+        refresh (bool): Whether the statistics are refreshed after loading, see `refresh_statistics`.
     Returns:
         None
     """
-    conn = psycopg2.connect(**DATABASE_CONFIG)
+    conn = get_pool().getconn()
     cursor = conn.cursor()
 
     try:
-        for vac in vacancies:
-            cursor.execute(
-                sql.SQL(
-                    "INSERT INTO vacancies (vacancy_id, employer_id, name, description, salary, url) "
-                    "VALUES (%s, %s, %s, %s, %s, %s) ON CONFLICT (vacancy_id) DO NOTHING;"),
-                (vac['vacancy_id'], vac['employer_id'], vac['name'], vac.get('description'), vac.get('salary'),
-                 vac['url'])
-            )
+        rows = vacancy_rows(vacancies)
+        counts = bulk_upsert(cursor, 'vacancies', VACANCY_COLUMNS, 'vacancy_id', rows, update=update)
         conn.commit()
-        print("Данные о вакансиях успешно заполнены")
+        print(f"Данные о вакансиях успешно заполнены: {format_upsert_counts(counts)}")
     except Exception as e:
         logger.error(f"Ошибка при заполнении данных о вакансиях: {e}")
         conn.rollback()
     finally:
         cursor.close()
-        conn.close()
+        get_pool().putconn(conn)
+
+    if refresh:
+        refresh_statistics()
@@ -1,31 +1,108 @@
-import psycopg2
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from prettytable import PrettyTable
-from typing import Dict, Optional
-from config import logger
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from config import DB_CURSOR_ITERSIZE, DB_POOL_MAX_SIZE, SEARCH_RESULTS_LIMIT, logger
+from vacancy_db_manager.db_pool import get_pool
+from vacancy_db_manager.metrics import span, timed
+from vacancy_db_manager.result_cache import get_result_cache
+
+ALL_VACANCIES_COLUMNS = ('employer_name', 'name', 'salary', 'url')
+ALL_VACANCIES_FIELD_NAMES = ["Компания", "Вакансия", "Зарплата, руб.", "Ссылка на вакансию"]
+ALL_VACANCIES_QUERY = """
+SELECT e.employer_name, v.name, v.salary_normalized, v.url
+FROM employers e
+LEFT JOIN vacancies v ON e.employer_id = v.employer_id AND NOT v.archived
+ORDER BY v.salary_normalized DESC;
+"""
+COMPANIES_QUERY = """
+SELECT employer_name, vacancies_count
+FROM employer_stats
+ORDER BY vacancies_count DESC;
+"""
+VACANCIES_PAGE_QUERY = """
+SELECT e.employer_name, v.name, v.salary_normalized, v.url, v.vacancy_id
+FROM vacancies v
+JOIN employers e ON v.employer_id = e.employer_id
+WHERE NOT v.archived AND v.salary_normalized IS NOT NULL {}
+ORDER BY v.salary_normalized DESC, v.vacancy_id DESC
+LIMIT %s
+"""
+VACANCIES_PAGE_AFTER = 'AND (v.salary_normalized, v.vacancy_id) < (%s, %s)'
+AVG_SALARY_QUERY = """
+SELECT ROUND(avg_salary) as avg_salary
+FROM salary_stats
+"""
+HIGHER_SALARY_QUERY = """
+SELECT e.employer_name, v.name, v.salary_normalized, v.url
+FROM vacancies v
+JOIN employers e ON v.employer_id = e.employer_id
+WHERE NOT v.archived AND v.salary_normalized > (SELECT avg_salary FROM salary_stats);
+"""
+SALARY_STATISTICS_QUERY = """
+SELECT employer_name, vacancies_count, ROUND(avg_salary), ROUND(median_salary::numeric),
+       ROUND(p25_salary::numeric), ROUND(p75_salary::numeric), ROUND(p90_salary::numeric)
+FROM employer_stats
+ORDER BY median_salary DESC NULLS LAST;
+"""
+KEYWORD_QUERY = """
+SELECT name, salary_normalized, url
+FROM vacancies
+WHERE NOT archived AND (name ILIKE %s OR description ILIKE %s)
+"""
+SEARCH_QUERY = """
+WITH q AS (
+    SELECT websearch_to_tsquery('russian', %(query)s) || websearch_to_tsquery('english', %(query)s)
+        AS tsquery
+)
+SELECT v.name, v.salary_normalized, v.url
+FROM vacancies v, q
+WHERE NOT v.archived AND (v.search_vector @@ q.tsquery OR v.name ILIKE %(pattern)s)
+ORDER BY ts_rank_cd(v.search_vector, q.tsquery) DESC, similarity(v.name, %(query)s) DESC
+LIMIT %(limit)s
+"""
+
+
+def search_params(search_query: str, limit: int) -> Dict[str, Any]:
+    """
+    Returns the parameters of SEARCH_QUERY, escaping the LIKE wildcards in the search query.
+    Args:
+        search_query (str): The words to search for.
+        limit (int): The maximum number of vacancies to return.
+    Returns:
+        Dict[str, Any]: The query parameters.
+    """
+    escaped = search_query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return {'query': search_query, 'pattern': f'%{escaped}%', 'limit': limit}
 
 
 class DBManager:
-    def __init__(self, config: Dict[str, str]) -> None:
+    def __init__(self, config: Dict[str, str], use_cache: bool = True) -> None:
         """
         Initializes the DBManager with the provided configuration.
         Args:
             config (Dict[str, str]): Database configuration parameters.
+            use_cache (bool): Whether query results are shared through the process-wide result cache, see
+                              `_fetch`.
         """
         self.config = config
+        self.cache = get_result_cache() if use_cache else None
 
     def __enter__(self) -> 'DBManager':
         """
-        Opens a connection to the database and returns the DBManager instance.
+        Borrows a connection from the process-wide pool and returns the DBManager instance.
+        The pool is thread-safe, so every thread can use its own DBManager to run reports concurrently.
         Returns:
             DBManager: The instance of the DBManager.
         """
-        self.conn = psycopg2.connect(**self.config)
+        self.pool = get_pool(self.config)
+        self.conn = self.pool.getconn()
         self.cursor = self.conn.cursor()
         return self
 
     def __exit__(self, exc_type: Optional[type], exc_val: Optional[Exception], exc_tb: Optional[Exception]) -> None:
         """
-        Closes the database connection and cursor.
+        Closes the cursor and returns the connection to the pool.
         Args:
             exc_type (Optional[type]): The exception type.
             exc_val (Optional[Exception]): The exception value.
@@ -34,24 +111,54 @@ class DBManager:
         if exc_type is not None:
             logger.error(f'Произошла ошибка {exc_type} {exc_val}')
         self.cursor.close()
-        self.conn.close()
+        self.pool.putconn(self.conn)
+
+    def get_data_version(self) -> int:
+        """
+        Reads the data version, which is bumped every time the statistics are refreshed after a load.
+        Returns:
+            int: The data version.
+        """
+        self.cursor.execute("SELECT version FROM data_version")
+        return self.cursor.fetchone()[0]
+
+    def _cache_key(self, query: str, params: Optional[Any]) -> Tuple[Any, ...]:
+        """
+        Returns the result cache key of a query: the database, the query text and its parameters.
+        """
+        if isinstance(params, dict):
+            params = tuple(sorted(params.items()))
+        return tuple(sorted(self.config.items())), query, params
 
+    def _fetch(self, query: str, params: Optional[Any] = None) -> List[Tuple[Any, ...]]:
+        """
+        Runs a query and returns all its rows. With the result cache enabled, the rows are reused until the
+        data version changes, and concurrent callers running the same query share a single execution.
+        Args:
+            query (str): The query.
+            params (Optional[Any]): The query parameters.
+        Returns:
+            List[Tuple[Any, ...]]: The rows. They must not be modified.
+        """
+        def execute() -> List[Tuple[Any, ...]]:
+            self.cursor.execute(query, params)
+            return self.cursor.fetchall()
+
+        if self.cache is None:
+            return execute()
+        return self.cache.get_or_compute(self._cache_key(query, params), self.get_data_version(), execute)
+
+    @timed('db_query')
     def get_companies_and_vacancies_count(self) -> PrettyTable:
         """
         Retrieves a list of all companies and the number of vacancies each company has.
+        The counts are read from the employer_stats materialized view refreshed after each load.
         Returns:
             PrettyTable: A formatted table containing the company name and the count of vacancies.
         """
-        query = """
-        SELECT e.employer_name, COUNT(v.vacancy_id) as vacancies_count
-        FROM employers e
-        LEFT JOIN vacancies v ON e.employer_id = v.employer_id
-        GROUP BY e.employer_name
-        ORDER BY vacancies_count DESC;
-        """
+        query = COMPANIES_QUERY
         try:
-            self.cursor.execute(query)
-            result = self.cursor.fetchall()
+            result = self._fetch(query)
 
             table = PrettyTable()
             table.field_names = ["Компания", "Количество вакансий"]
@@ -64,24 +171,19 @@ class DBManager:
             logger.error(f"Ошибка при поиске компаний и подсчете вакансий: {e}")
             raise
 
+    @timed('db_query')
     def get_all_vacancies(self) -> PrettyTable:
         """
         Retrieves a list of all vacancies with the company name, vacancy name, salary, and vacancy URL.
+        Salaries in every report are converted to roubles when the vacancies are loaded.
         Returns:
             PrettyTable: A formatted table containing the company name, vacancy name, salary, and URL.
         """
-        query = """
-        SELECT e.employer_name, v.name, v.salary, v.url
-        FROM employers e
-        LEFT JOIN vacancies v ON e.employer_id = v.employer_id
-        ORDER BY v.salary DESC;
-        """
         try:
-            self.cursor.execute(query)
-            result = self.cursor.fetchall()
+            result = self._fetch(ALL_VACANCIES_QUERY)
 
             table = PrettyTable()
-            table.field_names = ["Компания", "Вакансия", "Зарплата", "Ссылка на вакансию"]
+            table.field_names = ALL_VACANCIES_FIELD_NAMES
 
             for row in result:
                 table.add_row(row)
@@ -91,19 +193,63 @@ class DBManager:
             logger.error(f"Ошибка при получении вакансий: {e}")
             raise
 
+    def iter_all_vacancies(self, itersize: int = DB_CURSOR_ITERSIZE) -> Iterator[Tuple[Any, ...]]:
+        """
+        Streams the rows of `get_all_vacancies` through a named server-side cursor, so the result set is never
+        materialized in memory. Rows are fetched from the server `itersize` at a time. If the result of
+        `get_all_vacancies` is cached for the current data version, its rows are yielded instead.
+        Args:
+            itersize (int): The number of rows fetched per round trip.
+        Yields:
+            Tuple[Any, ...]: The company name, vacancy name, salary and URL, see ALL_VACANCIES_COLUMNS.
+        """
+        try:
+            if self.cache is not None:
+                cached = self.cache.get(self._cache_key(ALL_VACANCIES_QUERY, None), self.get_data_version())
+                if cached is not None:
+                    yield from cached
+                    return
+            with self.conn.cursor(name='all_vacancies') as cursor:
+                cursor.itersize = itersize
+                with span('db_query', function='DBManager.iter_all_vacancies'):
+                    cursor.execute(ALL_VACANCIES_QUERY)
+                yield from cursor
+        except Exception as e:
+            logger.error(f"Ошибка при получении вакансий: {e}")
+            raise
+
+    @timed('db_query')
+    def get_vacancies_page(self, limit: int, after: Optional[Tuple[int, int]] = None) -> List[Tuple[Any, ...]]:
+        """
+        Retrieves one page of vacancies with a salary, ordered by salary and vacancy ID descending, using keyset
+        pagination: the next page starts right after the (salary, vacancy_id) of the last row of the previous
+        one, so every page costs the same regardless of its position.
+        Args:
+            limit (int): The maximum number of rows in the page.
+            after (Optional[Tuple[int, int]]): The salary and vacancy ID of the last row of the previous page,
+                                               None for the first page.
+        Returns:
+            List[Tuple[Any, ...]]: The company name, vacancy name, salary, URL and vacancy ID of each vacancy.
+        """
+        query = VACANCIES_PAGE_QUERY.format(VACANCIES_PAGE_AFTER if after is not None else '')
+        params = (*after, limit) if after is not None else (limit,)
+
+        try:
+            return self._fetch(query, params)
+        except Exception as e:
+            logger.error(f"Ошибка при получении страницы вакансий: {e}")
+            raise
+
+    @timed('db_query')
     def get_avg_salary(self) -> PrettyTable:
         """
-        Retrieves the average salary of all vacancies from the database.
+        Retrieves the average salary of all vacancies from the salary_stats materialized view.
         Returns:
             PrettyTable: A formatted table containing the average salary. The table has one column.
         """
-        query = """
-        SELECT ROUND(AVG(v.salary)) as avg_salary
-        FROM vacancies v
-        """
+        query = AVG_SALARY_QUERY
         try:
-            self.cursor.execute(query)
-            result = self.cursor.fetchall()
+            result = self._fetch(query)
 
             table = PrettyTable()
             table.field_names = ["Средняя зарплата"]
@@ -116,29 +262,20 @@ class DBManager:
             logger.error(f"Ошибка при получении средней зарплаты: {e}")
             raise
 
+    @timed('db_query')
     def get_vacancies_with_higher_salary(self) -> PrettyTable:
         """
         Retrieves a list of all vacancies with a salary higher than the average salary of all vacancies.
+        The average salary is read from the salary_stats materialized view.
         Returns:
             PrettyTable: A formatted table containing the company name, vacancy name, salary, and URL.
         """
-        query = """
-        WITH avg_salary AS (
-            SELECT AVG(salary) AS average_salary
-            FROM vacancies
-        )
-        SELECT e.employer_name, v.name, v.salary, v.url
-        FROM vacancies v
-        JOIN employers e ON v.employer_id = e.employer_id
-        CROSS JOIN avg_salary
-        WHERE v.salary > avg_salary.average_salary;
-        """
+        query = HIGHER_SALARY_QUERY
         try:
-            self.cursor.execute(query)
-            result = self.cursor.fetchall()
+            result = self._fetch(query)
 
             table = PrettyTable()
-            table.field_names = ["Компания", "Вакансия", "Зарплата", "Ссылка на вакансию"]
+            table.field_names = ["Компания", "Вакансия", "Зарплата, руб.", "Ссылка на вакансию"]
 
             for row in result:
                 table.add_row(row)
@@ -148,6 +285,31 @@ class DBManager:
             logger.error(f"Ошибка при получении вакансий с зарплатой выше средней: {e}")
             raise
 
+    @timed('db_query')
+    def get_salary_statistics(self) -> PrettyTable:
+        """
+        Retrieves the salary distribution of each company from the employer_stats materialized view.
+        Returns:
+            PrettyTable: A formatted table containing the company name, the count of vacancies and the average,
+                         median, 25th, 75th and 90th percentile salary.
+        """
+        query = SALARY_STATISTICS_QUERY
+        try:
+            result = self._fetch(query)
+
+            table = PrettyTable()
+            table.field_names = ["Компания", "Количество вакансий", "Средняя зарплата", "Медианная зарплата",
+                                 "25-й процентиль", "75-й процентиль", "90-й процентиль"]
+
+            for row in result:
+                table.add_row(row)
+
+            return table
+        except Exception as e:
+            logger.error(f"Ошибка при получении статистики зарплат: {e}")
+            raise
+
+    @timed('db_query')
     def get_vacancies_with_keyword(self, keyword: str) -> PrettyTable:
         """
         Retrieves a list of all vacancies where the job title or description contains the specified keyword.
@@ -157,19 +319,14 @@ class DBManager:
             PrettyTable: A formatted table containing the job title, salary, and URL of each matching
                          vacancy.
         """
-        query = """
-        SELECT name, salary, url
-        FROM vacancies
-        WHERE name ILIKE %s OR description ILIKE %s
-        """
+        query = KEYWORD_QUERY
         params = (f'%{keyword}%', f'%{keyword}%')
 
         try:
-            self.cursor.execute(query, params)
-            result = self.cursor.fetchall()
+            result = self._fetch(query, params)
 
             table = PrettyTable()
-            table.field_names = ["Название вакансии", "Зарплата", "Ссылка"]
+            table.field_names = ["Название вакансии", "Зарплата, руб.", "Ссылка"]
 
             for row in result:
                 table.add_row(row)
@@ -178,3 +335,81 @@ class DBManager:
         except Exception as e:
             logger.error(f"Ошибка при получении вакансий с ключевым словом '{keyword}': {e}")
             raise
+
+    @timed('db_query')
+    def search_vacancies(self, search_query: str, limit: int = SEARCH_RESULTS_LIMIT) -> PrettyTable:
+        """
+        Searches vacancies by one or more words, ranking the results by relevance.
+
+        The query is matched against the full-text search vector of the vacancy name and description in both
+        Russian and English (quoted phrases, 'or' and '-word' are supported), and as a substring of the vacancy
+        name. Both conditions are served by GIN indexes, so the search does not scan the whole table.
+        Args:
+            search_query (str): The words to search for.
+            limit (int): The maximum number of vacancies to return.
+        Returns:
+            PrettyTable: A formatted table containing the job title, salary, and URL of each matching
+                         vacancy, the most relevant first.
+        """
+        query = SEARCH_QUERY
+        params = search_params(search_query, limit)
+
+        try:
+            result = self._fetch(query, params)
+
+            table = PrettyTable()
+            table.field_names = ["Название вакансии", "Зарплата, руб.", "Ссылка"]
+
+            for row in result:
+                table.add_row(row)
+
+            return table
+        except Exception as e:
+            logger.error(f"Ошибка при поиске вакансий по запросу '{search_query}': {e}")
+            raise
+
+
+PRECOMPUTED_REPORTS = ('get_companies_and_vacancies_count', 'get_avg_salary', 'get_salary_statistics')
+
+
+def _precompute_report(config: Dict[str, str], report: str) -> None:
+    """
+    Runs one report with its own DBManager so that its result is stored in the result cache.
+    """
+    try:
+        with DBManager(config) as db_manager:
+            getattr(db_manager, report)()
+    except Exception as e:
+        logger.error(f"Ошибка при предварительном расчёте отчёта {report}: {e}")
+
+
+def precompute_reports(config: Dict[str, str]) -> None:
+    """
+    Runs the reports of PRECOMPUTED_REPORTS concurrently, each in its own thread and with its own pooled
+    connection, so that their results are cached for the current data version. Only the aggregate reports,
+    whose size does not grow with the number of vacancies, are precomputed; the vacancy lists are left to be
+    streamed on demand.
+    Args:
+        config (Dict[str, str]): Database configuration parameters.
+    Returns:
+        None
+    """
+    if get_result_cache() is None:
+        return
+    with ThreadPoolExecutor(max_workers=min(len(PRECOMPUTED_REPORTS), DB_POOL_MAX_SIZE)) as executor:
+        for report in PRECOMPUTED_REPORTS:
+            executor.submit(_precompute_report, config, report)
+
+
+def start_precompute_reports(config: Dict[str, str]) -> threading.Thread:
+    """
+    Starts `precompute_reports` in a background thread, e.g. right after a load, and returns immediately.
+    A report requested before its precomputation has finished waits for it instead of running again.
+    Args:
+        config (Dict[str, str]): Database configuration parameters.
+    Returns:
+        threading.Thread: The started thread.
+    """
+    thread = threading.Thread(target=precompute_reports, args=(config,), daemon=True)
+    thread.start()
+    return thread
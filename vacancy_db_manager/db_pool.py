@@ -0,0 +1,211 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import psycopg2
+from psycopg2 import extensions
+
+from config import (DATABASE_CONFIG, DB_POOL_HEALTH_CHECK_INTERVAL, DB_POOL_IDLE_TIMEOUT, DB_POOL_MAX_SIZE,
+                    DB_POOL_MIN_SIZE, DB_POOL_TIMEOUT)
+
+_pools: Dict[Tuple[Tuple[str, Optional[str]], ...], 'ConnectionPool'] = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, config: Dict[str, str], min_size: int = DB_POOL_MIN_SIZE, max_size: int = DB_POOL_MAX_SIZE,
+                 idle_timeout: float = DB_POOL_IDLE_TIMEOUT,
+                 health_check_interval: float = DB_POOL_HEALTH_CHECK_INTERVAL) -> None:
+        """
+        Initializes a thread-safe pool of connections to one database.
+        Args:
+            config (Dict[str, str]): Database configuration parameters.
+            min_size (int): Number of idle connections that are never closed because of the idle timeout.
+            max_size (int): Maximum number of open connections, borrowed and idle together.
+            idle_timeout (float): Seconds after which an idle connection above min_size is closed.
+            health_check_interval (float): Seconds of idleness after which a connection is checked with
+                                           'SELECT 1' before being handed out.
+        """
+        self.config = config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._idle: List[Tuple[extensions.connection, float]] = []
+        self._size = 0
+        self._condition = threading.Condition()
+
+    def _connect(self) -> extensions.connection:
+        """
+        Opens a new connection.
+        Returns:
+            extensions.connection: The connection.
+        """
+        return psycopg2.connect(**self.config)
+
+    def _is_healthy(self, conn: extensions.connection, idle_since: float) -> bool:
+        """
+        Checks that a connection taken from the idle list can still be used. Must be called without the condition
+        held, since the check may make a round trip to the server.
+        Args:
+            conn (extensions.connection): The connection.
+            idle_since (float): The monotonic time the connection was returned to the pool.
+        Returns:
+            bool: True if the connection is usable.
+        """
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _close_expired(self) -> None:
+        """
+        Closes connections that stayed idle longer than idle_timeout while keeping at least min_size of them.
+        Must be called with the condition held.
+        """
+        now = time.monotonic()
+        while len(self._idle) > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.pop(0)
+            conn.close()
+            self._size -= 1
+
+    def getconn(self, timeout: Optional[float] = DB_POOL_TIMEOUT) -> extensions.connection:
+        """
+        Borrows a connection, opening a new one if none is idle and the pool is not full.
+        When the pool is full, waits for another thread to return a connection. An idle connection is taken off the
+        idle list under the lock and checked after releasing it, so a slow check does not block other threads.
+        Args:
+            timeout (Optional[float]): Maximum number of seconds to wait, None to wait forever.
+        Returns:
+            extensions.connection: The connection.
+        Raises:
+            PoolTimeoutError: If no connection became available in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            conn: Optional[extensions.connection] = None
+            with self._condition:
+                while True:
+                    self._close_expired()
+                    if self._idle:
+                        conn, idle_since = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise PoolTimeoutError(f"Нет свободных соединений с базой данных ({self.max_size})")
+                    self._condition.wait(remaining)
+
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+
+            if self._is_healthy(conn, idle_since):
+                return conn
+            conn.close()
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+
+    def putconn(self, conn: extensions.connection) -> None:
+        """
+        Returns a borrowed connection to the pool, rolling back an unfinished transaction.
+        Args:
+            conn (extensions.connection): The connection.
+        """
+        if not conn.closed and conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                conn.close()
+        with self._condition:
+            if conn.closed:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._close_expired()
+            self._condition.notify()
+
+    def closeall(self) -> None:
+        """
+        Closes all idle connections. Borrowed connections are closed when they are returned.
+        """
+        with self._condition:
+            for conn, _ in self._idle:
+                conn.close()
+            self._size -= len(self._idle)
+            self._idle.clear()
+
+    @contextmanager
+    def connection(self) -> Iterator[extensions.connection]:
+        """
+        Borrows a connection for the duration of a with block.
+        Yields:
+            extensions.connection: The connection.
+        """
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+
+def get_pool(config: Optional[Dict[str, str]] = None) -> ConnectionPool:
+    """
+    Returns the process-wide pool for the given database configuration, creating it on first use.
+    Args:
+        config (Optional[Dict[str, str]]): Database configuration parameters, DATABASE_CONFIG by default.
+    Returns:
+        ConnectionPool: The pool.
+    """
+    config = config or DATABASE_CONFIG
+    key = tuple(sorted(config.items()))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(config)
+        return _pools[key]
+
+
+@contextmanager
+def connection(config: Optional[Dict[str, str]] = None) -> Iterator[extensions.connection]:
+    """
+    Borrows a connection from the process-wide pool for the duration of a with block.
+    Args:
+        config (Optional[Dict[str, str]]): Database configuration parameters, DATABASE_CONFIG by default.
+    Yields:
+        extensions.connection: The connection.
+    """
+    with get_pool(config).connection() as conn:
+        yield conn
+
+
+def close_pools() -> None:
+    """
+    Closes the idle connections of every pool.
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+
+
+atexit.register(close_pools)
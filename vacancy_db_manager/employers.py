@@ -0,0 +1,70 @@
+from typing import Iterable, List, Optional
+
+from psycopg2.extras import execute_values
+
+from config import EMPLOYERS_FILE, logger
+from vacancy_db_manager.api_service import EMPLOYERS_ID
+from vacancy_db_manager.db_pool import connection
+
+
+def read_employer_ids_file(path: str) -> List[int]:
+    """
+    Reads employer IDs from a text file with one ID per line. Empty lines and lines starting with '#' are
+    ignored, as is anything after the ID on a line.
+    Args:
+        path (str): The path of the file.
+    Returns:
+        List[int]: The employer IDs in the order of the file, without duplicates.
+    """
+    employer_ids = {}
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                employer_ids[int(line.split()[0])] = None
+    return list(employer_ids)
+
+
+def get_tracked_employer_ids() -> List[int]:
+    """
+    Reads the IDs of the employers stored in the tracked_employers table.
+    Returns:
+        List[int]: The employer IDs in ascending order.
+    """
+    with connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT employer_id FROM tracked_employers ORDER BY employer_id")
+        return [row[0] for row in cursor]
+
+
+def add_tracked_employers(employer_ids: Iterable[int]) -> None:
+    """
+    Adds employers to the tracked_employers table, skipping the ones that are already tracked.
+    Args:
+        employer_ids (Iterable[int]): The employer IDs.
+    Returns:
+        None
+    """
+    with connection() as conn, conn.cursor() as cursor:
+        execute_values(cursor, "INSERT INTO tracked_employers (employer_id) VALUES %s ON CONFLICT DO NOTHING",
+                       [(employer_id,) for employer_id in employer_ids])
+        conn.commit()
+
+
+def load_employer_ids(path: Optional[str] = None) -> List[int]:
+    """
+    Returns the IDs of the employers to track: from the given file or EMPLOYERS_FILE if set, otherwise from
+    the tracked_employers table, and EMPLOYERS_ID if the table is empty.
+    Args:
+        path (Optional[str]): The path of a file with employer IDs, see `read_employer_ids_file`.
+    Returns:
+        List[int]: The employer IDs.
+    """
+    path = path or EMPLOYERS_FILE
+    if path:
+        return read_employer_ids_file(path)
+    try:
+        employer_ids = get_tracked_employer_ids()
+    except Exception as e:
+        logger.error(f"Ошибка при получении списка отслеживаемых работодателей: {e}")
+        employer_ids = []
+    return employer_ids or EMPLOYERS_ID
@@ -0,0 +1,85 @@
+import json
+from typing import Dict, List, Optional
+
+from psycopg2.extras import execute_values
+
+from config import EXCHANGE_RATES_FILE, logger
+from vacancy_db_manager.api_service import get_exchange_rates
+from vacancy_db_manager.db_pool import connection
+
+
+def read_exchange_rates_file(path: str) -> Dict[str, float]:
+    """
+    Reads exchange rates from a JSON file: either an object mapping currency codes to rates, e.g.
+    {"USD": 0.011}, or a saved response of the API dictionaries with a 'currency' list.
+    Args:
+        path (str): The path of the file.
+    Returns:
+        Dict[str, float]: The amount of each currency per rouble by currency code.
+    """
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    if isinstance(data.get('currency'), list):
+        return {currency['code']: currency['rate'] for currency in data['currency'] if currency.get('rate')}
+    return {code: float(rate) for code, rate in data.items()}
+
+
+def get_stored_exchange_rates() -> Dict[str, float]:
+    """
+    Reads the exchange rates stored in the exchange_rates table.
+    Returns:
+        Dict[str, float]: The amount of each currency per rouble by currency code.
+    """
+    with connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT currency, rate FROM exchange_rates ORDER BY currency")
+        return {currency: float(rate) for currency, rate in cursor}
+
+
+def update_exchange_rates(rates: Dict[str, float]) -> List[str]:
+    """
+    Stores exchange rates and recomputes the salary in roubles of the vacancies in the currencies whose rate
+    has changed. New vacancies get their salary in roubles from the stored rates when they are loaded.
+    Args:
+        rates (Dict[str, float]): The amount of each currency per rouble by currency code.
+    Returns:
+        List[str]: The codes of the currencies whose rate has been added or changed.
+    """
+    with connection() as conn, conn.cursor() as cursor:
+        changed = execute_values(
+            cursor,
+            "INSERT INTO exchange_rates (currency, rate) VALUES %s "
+            "ON CONFLICT (currency) DO UPDATE SET rate = EXCLUDED.rate, updated_at = now() "
+            "WHERE exchange_rates.rate <> EXCLUDED.rate RETURNING currency",
+            list(rates.items()), fetch=True
+        )
+        changed_currencies = [row[0] for row in changed]
+        if changed_currencies:
+            cursor.execute(
+                "UPDATE vacancies SET salary_normalized = normalize_salary(salary, salary_currency) "
+                "WHERE COALESCE(salary_currency, 'RUR') = ANY(%s)",
+                (changed_currencies,)
+            )
+        conn.commit()
+    return changed_currencies
+
+
+def load_exchange_rates(path: Optional[str] = None) -> None:
+    """
+    Updates the stored exchange rates from the given file or EXCHANGE_RATES_FILE if set, otherwise from the
+    API. If neither is available the previously stored rates are kept.
+    Args:
+        path (Optional[str]): The path of a file with exchange rates, see `read_exchange_rates_file`.
+    Returns:
+        None
+    """
+    path = path or EXCHANGE_RATES_FILE
+    try:
+        rates = read_exchange_rates_file(path) if path else get_exchange_rates()
+        if not rates:
+            print("Не удалось получить курсы валют, используются сохранённые")
+            return
+        changed_currencies = update_exchange_rates(rates)
+        if changed_currencies:
+            print(f"Обновлены курсы валют: {', '.join(changed_currencies)}")
+    except Exception as e:
+        logger.error(f"Ошибка при обновлении курсов валют: {e}")
@@ -0,0 +1,95 @@
+import csv
+import json
+from decimal import Decimal
+from itertools import islice
+from typing import Any, Iterable, Iterator, Sequence, TextIO
+
+from prettytable import PrettyTable
+
+
+def iter_tables(rows: Iterable[Sequence[Any]], field_names: Sequence[str], chunk_size: int) -> Iterator[PrettyTable]:
+    """
+    Renders rows as a sequence of tables of at most `chunk_size` rows, so the rows never have to be in memory
+    all at once.
+    Args:
+        rows (Iterable[Sequence[Any]]): The rows to render.
+        field_names (Sequence[str]): The column headers.
+        chunk_size (int): The maximum number of rows in one table.
+    Yields:
+        PrettyTable: The next table.
+    """
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, chunk_size)):
+        table = PrettyTable()
+        table.field_names = list(field_names)
+        table.add_rows(chunk)
+        yield table
+
+
+def write_csv(rows: Iterable[Sequence[Any]], columns: Sequence[str], fp: TextIO) -> int:
+    """
+    Writes rows to a file in CSV format with a header line.
+    Args:
+        rows (Iterable[Sequence[Any]]): The rows to write.
+        columns (Sequence[str]): The column names.
+        fp (TextIO): The file to write to.
+    Returns:
+        int: The number of rows written.
+    """
+    writer = csv.writer(fp)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Converts values that the json module cannot serialize, such as Decimal and datetime.
+    """
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def write_jsonl(rows: Iterable[Sequence[Any]], columns: Sequence[str], fp: TextIO) -> int:
+    """
+    Writes rows to a file as JSON Lines, one object per row keyed by column name.
+    Args:
+        rows (Iterable[Sequence[Any]]): The rows to write.
+        columns (Sequence[str]): The column names.
+        fp (TextIO): The file to write to.
+    Returns:
+        int: The number of rows written.
+    """
+    count = 0
+    for row in rows:
+        fp.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default))
+        fp.write('\n')
+        count += 1
+    return count
+
+
+def write_json(rows: Iterable[Sequence[Any]], columns: Sequence[str], fp: TextIO) -> int:
+    """
+    Writes rows to a file as a JSON array of objects keyed by column name. The array is written row by row,
+    so the rows never have to be in memory all at once.
+    Args:
+        rows (Iterable[Sequence[Any]]): The rows to write.
+        columns (Sequence[str]): The column names.
+        fp (TextIO): The file to write to.
+    Returns:
+        int: The number of rows written.
+    """
+    count = 0
+    fp.write('[')
+    for row in rows:
+        fp.write(',\n' if count else '\n')
+        fp.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default))
+        count += 1
+    fp.write('\n]\n' if count else ']\n')
+    return count
@@ -0,0 +1,58 @@
+import json
+from itertools import islice
+from typing import Any, Dict, Iterator
+
+from config import BULK_BATCH_SIZE
+from vacancy_db_manager.db_creator import EMPLOYER_COLUMNS, VACANCY_COLUMNS, bulk_upsert, refresh_statistics
+from vacancy_db_manager.db_pool import connection
+from vacancy_db_manager.parsers import parse_vacancy_rows
+
+
+def iter_vacancy_items(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Reads vacancy items as returned by the API from a file: JSON Lines with one item per line if the name ends
+    with '.jsonl', otherwise a JSON document with either a list of items or a saved page of the vacancies
+    search with an 'items' list. JSON Lines files are read line by line.
+    Args:
+        path (str): The path of the file.
+    Yields:
+        Dict[str, Any]: The vacancy items.
+    """
+    with open(path, encoding='utf-8') as file:
+        if path.endswith('.jsonl'):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            data = json.load(file)
+            yield from data.get('items', []) if isinstance(data, dict) else data
+
+
+def load_vacancies_file(path: str, update: bool = True) -> int:
+    """
+    Loads vacancy items from a file, see `iter_vacancy_items`, into the database without touching the API.
+    The employers of the vacancies are taken from the items as well. Rows are loaded in batches of
+    BULK_BATCH_SIZE, each committed on its own, and the statistics are refreshed at the end.
+    Args:
+        path (str): The path of the file.
+        update (bool): Whether already stored vacancies are updated.
+    Returns:
+        int: The number of loaded vacancies.
+    """
+    loaded = 0
+    items = iter_vacancy_items(path)
+    with connection() as conn, conn.cursor() as cursor:
+        while batch := list(islice(items, BULK_BATCH_SIZE)):
+            employers = {}
+            for vac in batch:
+                employer = vac.get('employer') or {}
+                if employer.get('id') is not None:
+                    employer_id = int(employer['id'])
+                    employers[employer_id] = (employer_id, employer.get('name') or '',
+                                              employer.get('alternate_url') or '')
+            bulk_upsert(cursor, 'employers', EMPLOYER_COLUMNS, 'employer_id', employers.values())
+            bulk_upsert(cursor, 'vacancies', VACANCY_COLUMNS, 'vacancy_id', parse_vacancy_rows(batch), update=update)
+            conn.commit()
+            loaded += len(batch)
+    refresh_statistics()
+    return loaded
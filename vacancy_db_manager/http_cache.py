@@ -0,0 +1,150 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from config import HTTP_CACHE_MAX_SIZE_MB, HTTP_CACHE_PATH
+
+_cache: Optional['ResponseCache'] = None
+_cache_lock = threading.Lock()
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+    def is_fresh(self, ttl: float) -> bool:
+        """
+        Checks whether the response can be used without revalidating it with the server.
+        Args:
+            ttl (float): The number of seconds a response stays fresh after it was stored or revalidated.
+        Returns:
+            bool: True if the response is fresh.
+        """
+        return time.time() - self.stored_at < ttl
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        Builds the headers of a conditional request that revalidates the response.
+        Returns:
+            Dict[str, str]: The If-None-Match and If-Modified-Since headers known for the response.
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    def __init__(self, path: str, max_size_bytes: int) -> None:
+        """
+        Opens (or creates) an SQLite-backed cache of HTTP response bodies keyed by URL.
+        When the total size of the stored bodies exceeds max_size_bytes, the least recently used responses
+        are evicted.
+        Args:
+            path (str): The path of the SQLite database file.
+            max_size_bytes (int): The maximum total size of the stored bodies.
+        """
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at_idx ON responses (accessed_at)")
+        self._conn.commit()
+        self._total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """
+        Looks up the stored response for a URL and marks it as recently used.
+        Args:
+            url (str): The full request URL including the query string.
+        Returns:
+            Optional[CachedResponse]: The stored response, or None if there is none.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+            return CachedResponse(*row)
+
+    def put(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """
+        Stores the response for a URL, replacing the previous one, and evicts old responses if needed.
+        Args:
+            url (str): The full request URL including the query string.
+            body (bytes): The response body.
+            etag (Optional[str]): The ETag header of the response.
+            last_modified (Optional[str]): The Last-Modified header of the response.
+        """
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, body, etag, last_modified, stored_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, now, now, len(body)))
+            self._total_size += len(body) - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, url: str) -> None:
+        """
+        Marks the response for a URL as revalidated, after the server answered 304 Not Modified.
+        Args:
+            url (str): The full request URL including the query string.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """
+        Deletes the least recently used responses until the total size fits max_size_bytes.
+        Must be called with the lock held.
+        """
+        while self._total_size > self.max_size_bytes:
+            rows = self._conn.execute(
+                "SELECT url, size FROM responses ORDER BY accessed_at LIMIT 100").fetchall()
+            if not rows:
+                self._total_size = 0
+                return
+            for url, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._total_size -= size
+                if self._total_size <= self.max_size_bytes:
+                    return
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """
+    Returns the process-wide response cache, opening it on first use.
+    Returns:
+        Optional[ResponseCache]: The cache, or None if caching is disabled by an empty HTTP_CACHE_PATH.
+    """
+    global _cache
+    if not HTTP_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(HTTP_CACHE_PATH, int(HTTP_CACHE_MAX_SIZE_MB * 1024 * 1024))
+        return _cache
+
@@ -0,0 +1,377 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (API_BACKOFF_BASE, API_BACKOFF_MAX, API_BREAKER_RESET_TIMEOUT, API_BREAKER_THRESHOLD,
+                    API_CONNECT_TIMEOUT, API_MAX_RETRIES, API_MAX_WORKERS, API_READ_TIMEOUT, API_REQUESTS_PER_SECOND,
+                    HTTP_CACHE_OFFLINE, HTTP_CACHE_TTL, logger)
+from vacancy_db_manager.http_cache import get_cache
+from vacancy_db_manager.metrics import increment, span
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_rate_limiters: Dict[str, 'RateLimiter'] = {}
+_rate_limiters_lock = threading.Lock()
+_requests_per_second = API_REQUESTS_PER_SECOND
+_circuit_breakers: Dict[str, 'CircuitBreaker'] = {}
+_circuit_breakers_lock = threading.Lock()
+_failures: List['RequestFailure'] = []
+_failures_lock = threading.Lock()
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    def __init__(self, requests_per_second: float) -> None:
+        """
+        Initializes the RateLimiter that spaces requests evenly in time.
+        Args:
+            requests_per_second (float): Maximum number of requests per second. Zero or less disables limiting.
+        """
+        self.interval = 1 / requests_per_second if requests_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        """
+        Blocks the calling thread until the next request slot is available.
+        The slot is reserved under the lock, the sleep itself happens outside of it, so waiting threads
+        do not serialize each other more than the configured rate requires.
+        """
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FetchError(Exception):
+    pass
+
+
+class RequestFailure(NamedTuple):
+    url: str
+    endpoint: str
+    reason: str
+    attempts: int
+    failed_at: float
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, reset_timeout: float) -> None:
+        """
+        Initializes a circuit breaker that stops requests to an endpoint after repeated failures.
+        After `threshold` consecutive failures the breaker opens and requests fail immediately. Once
+        `reset_timeout` seconds have passed, a single trial request is let through: success closes the breaker,
+        failure opens it again.
+        Args:
+            threshold (int): The number of consecutive failures that opens the breaker.
+            reset_timeout (float): The number of seconds the breaker stays open.
+        """
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_progress = False
+
+    def allow_request(self) -> bool:
+        """
+        Checks whether a request may be made now.
+        Returns:
+            bool: False if the breaker is open.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_progress:
+                return False
+            self._trial_in_progress = True
+            return True
+
+    def record_success(self) -> None:
+        """
+        Closes the breaker after a successful request.
+        """
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        """
+        Counts a failed request, opening the breaker when the threshold is reached or a trial request failed.
+        """
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_progress or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+                self._trial_in_progress = False
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide HTTP session with keep-alive connections shared by all worker threads.
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=API_MAX_WORKERS, pool_maxsize=API_MAX_WORKERS)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+
+def get_rate_limiter(url: str) -> RateLimiter:
+    """
+    Returns the rate limiter for the host of the given URL, creating it on first use.
+    Args:
+        url (str): The URL of the request.
+    Returns:
+        RateLimiter: The rate limiter shared by all requests to the same host.
+    """
+    host = urlsplit(url).netloc
+    with _rate_limiters_lock:
+        if host not in _rate_limiters:
+            _rate_limiters[host] = RateLimiter(_requests_per_second)
+        return _rate_limiters[host]
+
+
+def set_requests_per_second(requests_per_second: float) -> None:
+    """
+    Changes the per-host request rate limit of this process, e.g. to share API_REQUESTS_PER_SECOND between
+    several worker processes.
+    Args:
+        requests_per_second (float): Maximum number of requests per second. Zero or less disables limiting.
+    """
+    global _requests_per_second
+    with _rate_limiters_lock:
+        _requests_per_second = requests_per_second
+        _rate_limiters.clear()
+
+
+def _endpoint(url: str) -> str:
+    """
+    Returns the endpoint of a URL that circuit breakers and failures are grouped by: the host and the first
+    path segment, e.g. 'api.hh.ru/vacancies'.
+    """
+    parts = urlsplit(url)
+    return f"{parts.netloc}/{parts.path.strip('/').split('/')[0]}"
+
+
+def get_circuit_breaker(url: str) -> CircuitBreaker:
+    """
+    Returns the circuit breaker for the endpoint of the given URL, creating it on first use.
+    Args:
+        url (str): The URL of the request.
+    Returns:
+        CircuitBreaker: The circuit breaker shared by all requests to the same endpoint.
+    """
+    endpoint = _endpoint(url)
+    with _circuit_breakers_lock:
+        if endpoint not in _circuit_breakers:
+            _circuit_breakers[endpoint] = CircuitBreaker(API_BREAKER_THRESHOLD, API_BREAKER_RESET_TIMEOUT)
+        return _circuit_breakers[endpoint]
+
+
+def _retry_delay(attempt: int, response: Optional[requests.Response]) -> float:
+    """
+    Computes how long to wait before the next attempt: the Retry-After header of the response if present,
+    otherwise exponential backoff with full jitter.
+    Args:
+        attempt (int): The number of the failed attempt, starting from 0.
+        response (Optional[requests.Response]): The failed response, None if the request raised.
+    Returns:
+        float: The delay in seconds.
+    """
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            try:
+                return max((parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(API_BACKOFF_MAX, API_BACKOFF_BASE * 2 ** attempt))
+
+
+def _record_failure(url: str, reason: str, attempts: int) -> None:
+    """
+    Adds a request that could not be completed to the failure report.
+    """
+    logger.error(f"Не удалось получить {url} после {attempts} попыток: {reason}")
+    increment('http_failures', endpoint=_endpoint(url))
+    with _failures_lock:
+        _failures.append(RequestFailure(url, _endpoint(url), reason, attempts, time.time()))
+
+
+def get_failure_report() -> Dict[str, List[RequestFailure]]:
+    """
+    Returns the requests that could not be completed since the process started or the report was cleared.
+    Returns:
+        Dict[str, List[RequestFailure]]: The failed requests grouped by endpoint.
+    """
+    report: Dict[str, List[RequestFailure]] = {}
+    with _failures_lock:
+        for failure in _failures:
+            report.setdefault(failure.endpoint, []).append(failure)
+    return report
+
+
+def merge_failure_report(report: Dict[str, List[RequestFailure]]) -> None:
+    """
+    Adds the failed requests of another process, see `get_failure_report`.
+    Args:
+        report (Dict[str, List[RequestFailure]]): The failed requests grouped by endpoint.
+    Returns:
+        None
+    """
+    with _failures_lock:
+        for failures in report.values():
+            _failures.extend(failures)
+
+
+def clear_failure_report() -> None:
+    """
+    Forgets the failed requests collected so far.
+    """
+    with _failures_lock:
+        _failures.clear()
+
+
+def _request(url: str, headers: Optional[Dict[str, str]]) -> requests.Response:
+    """
+    Makes a GET request with timeouts, retrying errors raised by requests (connection errors, timeouts, broken
+    or undecodable bodies, redirect loops), 429 and 5xx responses up to API_MAX_RETRIES times, through the
+    circuit breaker of the endpoint.
+    Args:
+        url (str): The full URL to request.
+        headers (Optional[Dict[str, str]]): Additional request headers.
+    Returns:
+        requests.Response: The final response, whose status is not retryable.
+    Raises:
+        FetchError: If the circuit breaker is open or all attempts failed.
+    """
+    breaker = get_circuit_breaker(url)
+    endpoint = _endpoint(url)
+    reason = ''
+    for attempt in range(API_MAX_RETRIES + 1):
+        if not breaker.allow_request():
+            _record_failure(url, f'circuit breaker is open ({reason or "earlier failures"})', attempt)
+            raise FetchError(f"Запросы к {endpoint} временно приостановлены")
+
+        get_rate_limiter(url).wait()
+        response = None
+        try:
+            with span('http_request', endpoint=endpoint):
+                response = get_session().get(url=url, headers=headers,
+                                             timeout=(API_CONNECT_TIMEOUT, API_READ_TIMEOUT))
+            increment('http_requests', endpoint=endpoint, status=response.status_code)
+            if response.status_code not in RETRYABLE_STATUSES:
+                breaker.record_success()
+                return response
+            reason = f'HTTP {response.status_code}'
+        except requests.RequestException as e:
+            increment('http_requests', endpoint=endpoint, status=type(e).__name__)
+            reason = f'{type(e).__name__}: {e}'
+        breaker.record_failure()
+
+        if attempt < API_MAX_RETRIES:
+            increment('http_retries', endpoint=endpoint)
+            time.sleep(_retry_delay(attempt, response))
+
+    _record_failure(url, reason, API_MAX_RETRIES + 1)
+    raise FetchError(f"Не удалось получить {url}: {reason}")
+
+
+def _decode_json(url: str, body: bytes) -> Any:
+    """
+    Decodes a JSON response body.
+    Raises:
+        FetchError: If the body is not valid JSON, e.g. an HTML error page; the failure is reported.
+    """
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        _record_failure(url, f'invalid JSON: {e}', 1)
+        raise FetchError(f"Не удалось разобрать ответ {url}: {e}")
+
+
+def get_json(url: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+    """
+    Makes a rate-limited GET request through the shared session and decodes the JSON body.
+
+    Responses are stored in the on-disk response cache. A cached response younger than HTTP_CACHE_TTL is used
+    without a request, an older one is revalidated with a conditional request and reused on 304 Not Modified.
+    With HTTP_CACHE_OFFLINE only cached responses are used and the network is never touched.
+
+    Transient failures are retried with exponential backoff, see `_request`. Requests that still fail are
+    added to the failure report, see `get_failure_report`.
+    Args:
+        url (str): The URL to request.
+        params (Optional[Dict[str, Any]]): Query string parameters.
+    Returns:
+        Optional[Any]: The decoded JSON body, or None if the resource does not exist (404).
+    Raises:
+        FetchError: If the request failed, the body is not valid JSON, or the response is not cached in
+                    offline mode, so that a missing response is never mistaken for a missing resource.
+    """
+    url = requests.Request('GET', url, params=params).prepare().url
+    cache = get_cache()
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None and (HTTP_CACHE_OFFLINE or cached.is_fresh(HTTP_CACHE_TTL)):
+        increment('http_cache_hits', result='fresh')
+        return _decode_json(url, cached.body)
+    if HTTP_CACHE_OFFLINE:
+        _record_failure(url, 'not cached in offline mode', 0)
+        raise FetchError(f"Ответ на запрос {url} отсутствует в кэше")
+
+    headers = cached.conditional_headers() if cached is not None else None
+    response = _request(url, headers)
+    if response.status_code == 304 and cached is not None:
+        increment('http_cache_hits', result='not_modified')
+        cache.touch(url)
+        return _decode_json(url, cached.body)
+    if response.status_code == 200:
+        data = _decode_json(url, response.content)
+        if cache is not None:
+            cache.put(url, response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return data
+    if response.status_code == 404:
+        return None
+    _record_failure(url, f'HTTP {response.status_code}', 1)
+    raise FetchError(f"Не удалось получить {url}: HTTP {response.status_code}")
+
+
+def map_concurrently(func: Callable[[T], R], items: Iterable[T], max_workers: Optional[int] = None) -> List[R]:
+    """
+    Applies a function to every item using a bounded pool of worker threads.
+    Args:
+        func (Callable[[T], R]): The function to apply.
+        items (Iterable[T]): The items to process.
+        max_workers (Optional[int]): Maximum number of concurrent calls, API_MAX_WORKERS by default.
+    Returns:
+        List[R]: The results in the same order as the items.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or API_MAX_WORKERS) as executor:
+        return list(executor.map(func, items))
@@ -0,0 +1,271 @@
+import atexit
+import cProfile
+import functools
+import json
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from config import METRICS_FILE, METRICS_PREFIX, PROFILE_DIR, PROFILER, logger
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_spans: Dict[_Key, List[float]] = {}
+_counters: Dict[_Key, float] = {}
+_lock = threading.Lock()
+
+
+def _key(name: str, labels: Dict[str, Any]) -> _Key:
+    """
+    Returns the key of a metric: its name and its labels sorted by label name.
+    """
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def record_span(name: str, seconds: float, **labels: Any) -> None:
+    """
+    Records the duration of one operation in the span summary with the given name and labels.
+    Args:
+        name (str): The name of the span, e.g. 'http_request'.
+        seconds (float): The duration of the operation.
+        **labels: Labels that split the span, e.g. endpoint='api.hh.ru/vacancies'.
+    Returns:
+        None
+    """
+    key = _key(name, labels)
+    with _lock:
+        summary = _spans.get(key)
+        if summary is None:
+            _spans[key] = [1, seconds, seconds]
+        else:
+            summary[0] += 1
+            summary[1] += seconds
+            summary[2] = max(summary[2], seconds)
+
+
+@contextmanager
+def span(name: str, **labels: Any) -> Iterator[None]:
+    """
+    Times the body of a with block, see `record_span`. The duration is recorded even if the body raises.
+    Args:
+        name (str): The name of the span.
+        **labels: Labels that split the span.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - started, **labels)
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """
+    Returns a decorator that times every call of a function in the span with the given name, labelled with
+    the qualified name of the function.
+    Args:
+        name (str): The name of the span.
+    Returns:
+        Callable[[Callable], Callable]: The decorator.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name, function=func.__qualname__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def increment(name: str, value: float = 1, **labels: Any) -> None:
+    """
+    Adds a value to the counter with the given name and labels.
+    Args:
+        name (str): The name of the counter, e.g. 'http_requests'.
+        value (float): The value to add.
+        **labels: Labels that split the counter.
+    Returns:
+        None
+    """
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def get_metrics() -> Dict[str, Dict[_Key, Any]]:
+    """
+    Returns a snapshot of the metrics recorded by this process, which can be sent to another process and
+    added to its metrics with `merge_metrics`.
+    Returns:
+        Dict[str, Dict[_Key, Any]]: 'spans' with the count, total and maximum duration of every span, and
+                                    'counters' with the value of every counter.
+    """
+    with _lock:
+        return {'spans': {key: list(summary) for key, summary in _spans.items()}, 'counters': dict(_counters)}
+
+
+def merge_metrics(snapshot: Dict[str, Dict[_Key, Any]]) -> None:
+    """
+    Adds the metrics of another process, see `get_metrics`.
+    Args:
+        snapshot (Dict[str, Dict[_Key, Any]]): The metrics to add.
+    Returns:
+        None
+    """
+    with _lock:
+        for key, (count, total, maximum) in snapshot['spans'].items():
+            summary = _spans.setdefault(key, [0, 0.0, 0.0])
+            summary[0] += count
+            summary[1] += total
+            summary[2] = max(summary[2], maximum)
+        for key, value in snapshot['counters'].items():
+            _counters[key] = _counters.get(key, 0) + value
+
+
+def reset_metrics() -> None:
+    """
+    Forgets all recorded metrics.
+    """
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    """
+    Formats labels for the Prometheus text format, escaping the values.
+    """
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{label}="{value}"' for (label, _), value in zip(labels, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    """
+    Formats a counter value exactly: whole numbers as integers, other values with all their digits.
+    """
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def format_prometheus() -> str:
+    """
+    Formats the metrics in the Prometheus text exposition format: every span as a summary in seconds with a
+    gauge of its maximum duration, every counter with the '_total' suffix. Names get the METRICS_PREFIX prefix.
+    Returns:
+        str: The metrics.
+    """
+    metrics = get_metrics()
+    lines: List[str] = []
+    for name in sorted({name for name, _ in metrics['spans']}):
+        series = sorted((labels, summary) for (span_name, labels), summary in metrics['spans'].items()
+                        if span_name == name)
+        metric = f'{METRICS_PREFIX}_{name}_seconds'
+        lines.append(f'# TYPE {metric} summary')
+        for labels, (count, total, _) in series:
+            lines.append(f'{metric}_count{_format_labels(labels)} {count}')
+            lines.append(f'{metric}_sum{_format_labels(labels)} {total:.6f}')
+        lines.append(f'# TYPE {metric}_max gauge')
+        for labels, (_, _, maximum) in series:
+            lines.append(f'{metric}_max{_format_labels(labels)} {maximum:.6f}')
+    for name in sorted({name for name, _ in metrics['counters']}):
+        metric = f'{METRICS_PREFIX}_{name}_total'
+        lines.append(f'# TYPE {metric} counter')
+        for (counter_name, labels), value in sorted(metrics['counters'].items()):
+            if counter_name == name:
+                lines.append(f'{metric}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def format_json() -> str:
+    """
+    Formats the metrics as a JSON document with a list of spans and a list of counters.
+    Returns:
+        str: The metrics.
+    """
+    metrics = get_metrics()
+    return json.dumps({
+        'spans': [{'name': name, 'labels': dict(labels), 'count': count, 'sum_seconds': total,
+                   'max_seconds': maximum}
+                  for (name, labels), (count, total, maximum) in sorted(metrics['spans'].items())],
+        'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                     for (name, labels), value in sorted(metrics['counters'].items())],
+    }, ensure_ascii=False, indent=2)
+
+
+def write_metrics(path: str = METRICS_FILE) -> None:
+    """
+    Writes the metrics to a file, as JSON if its name ends with '.json' and in the Prometheus text format
+    otherwise, e.g. for the textfile collector of node_exporter. The file is replaced atomically.
+    Args:
+        path (str): The path of the file, METRICS_FILE by default. Nothing is written if it is empty.
+    Returns:
+        None
+    """
+    if not path:
+        return
+    content = format_json() if path.endswith('.json') else format_prometheus()
+    try:
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(f'{path}.tmp', path)
+    except OSError as e:
+        logger.error(f"Ошибка при записи метрик в {path}: {e}")
+
+
+@contextmanager
+def profile(name: str) -> Iterator[None]:
+    """
+    Profiles the body of a with block with the profiler selected by PROFILER: 'cprofile' writes
+    PROFILE_DIR/<name>-<pid>-<time>.prof for pstats or snakeviz, 'pyinstrument' writes an HTML report instead.
+    Without PROFILER, or if pyinstrument is not installed, the body simply runs.
+    Args:
+        name (str): The name of the profiled operation, used in the file name.
+    """
+    if PROFILER not in ('cprofile', 'pyinstrument'):
+        yield
+        return
+
+    if PROFILER == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.error("Профилировщик pyinstrument не установлен")
+            yield
+            return
+        profiler = Profiler()
+    else:
+        profiler = cProfile.Profile()
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f'{name}-{os.getpid()}-{int(time.time())}')
+    if PROFILER == 'pyinstrument':
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(f'{path}.html', 'w', encoding='utf-8') as file:
+                file.write(profiler.output_html())
+    else:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(f'{path}.prof')
+
+
+def _write_metrics_at_exit() -> None:
+    """
+    Writes the metrics when the main process exits. Worker processes, e.g. those of `run_sharded_sync`, return
+    their metrics to the main process instead of overwriting the file with partial results.
+    """
+    if multiprocessing.parent_process() is None:
+        write_metrics()
+
+
+atexit.register(_write_metrics_at_exit)
@@ -0,0 +1,287 @@
+from typing import List, Tuple
+
+from config import logger
+from vacancy_db_manager.db_pool import connection
+
+MIGRATIONS_LOCK_ID = 7243501
+
+CREATE_TABLES_QUERIES = [
+    """
+    CREATE TABLE IF NOT EXISTS employers (
+        employer_id INTEGER PRIMARY KEY,
+        employer_name VARCHAR(250) NOT NULL,
+        url TEXT NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS vacancies (
+        id SERIAL PRIMARY KEY,
+        vacancy_id INTEGER NOT NULL UNIQUE,
+        employer_id INTEGER NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        description TEXT,
+        salary INTEGER,
+        url TEXT NOT NULL,
+        published_at TIMESTAMPTZ,
+        archived BOOLEAN NOT NULL DEFAULT FALSE,
+        FOREIGN KEY (employer_id) REFERENCES employers (employer_id) ON DELETE CASCADE
+    );
+    """,
+    """
+    ALTER TABLE vacancies
+        ADD COLUMN IF NOT EXISTS published_at TIMESTAMPTZ,
+        ADD COLUMN IF NOT EXISTS archived BOOLEAN NOT NULL DEFAULT FALSE;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sync_state (
+        employer_id INTEGER PRIMARY KEY,
+        last_synced_at TIMESTAMPTZ NOT NULL,
+        last_full_sync_at TIMESTAMPTZ,
+        FOREIGN KEY (employer_id) REFERENCES employers (employer_id) ON DELETE CASCADE
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tracked_employers (
+        employer_id INTEGER PRIMARY KEY
+    );
+    """,
+    """
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    """,
+    """
+    ALTER TABLE vacancies
+        ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('russian', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(description, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED;
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS vacancies_search_vector_idx ON vacancies USING GIN (search_vector);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS vacancies_name_trgm_idx ON vacancies USING GIN (name gin_trgm_ops);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS vacancies_description_trgm_idx ON vacancies USING GIN (description gin_trgm_ops);
+    """,
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS employer_stats AS
+    SELECT e.employer_id,
+           e.employer_name,
+           COUNT(v.vacancy_id) AS vacancies_count,
+           AVG(v.salary) AS avg_salary,
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY v.salary) AS median_salary,
+           percentile_cont(0.25) WITHIN GROUP (ORDER BY v.salary) AS p25_salary,
+           percentile_cont(0.75) WITHIN GROUP (ORDER BY v.salary) AS p75_salary,
+           percentile_cont(0.9) WITHIN GROUP (ORDER BY v.salary) AS p90_salary
+    FROM employers e
+    LEFT JOIN vacancies v ON e.employer_id = v.employer_id AND NOT v.archived
+    GROUP BY e.employer_id, e.employer_name;
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS employer_stats_employer_id_idx ON employer_stats (employer_id);
+    """,
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS salary_stats AS
+    SELECT 1 AS id,
+           COUNT(salary) AS vacancies_count,
+           AVG(salary) AS avg_salary,
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY salary) AS median_salary,
+           percentile_cont(0.25) WITHIN GROUP (ORDER BY salary) AS p25_salary,
+           percentile_cont(0.75) WITHIN GROUP (ORDER BY salary) AS p75_salary,
+           percentile_cont(0.9) WITHIN GROUP (ORDER BY salary) AS p90_salary
+    FROM vacancies
+    WHERE NOT archived;
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS salary_stats_id_idx ON salary_stats (id);
+    """
+]
+
+
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, 'Начальная схема', CREATE_TABLES_QUERIES),
+    (2, 'Индексы по работодателю и зарплате', [
+        """
+        CREATE INDEX IF NOT EXISTS vacancies_employer_id_idx ON vacancies (employer_id);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS vacancies_salary_idx ON vacancies (salary DESC, vacancy_id DESC)
+        WHERE NOT archived;
+        """,
+    ]),
+    (3, 'Первичный ключ vacancy_id вместо суррогатного id', [
+        """
+        ALTER TABLE vacancies DROP COLUMN IF EXISTS id;
+        """,
+        """
+        ALTER TABLE vacancies DROP CONSTRAINT IF EXISTS vacancies_vacancy_id_key;
+        """,
+        """
+        ALTER TABLE vacancies ADD CONSTRAINT vacancies_pkey PRIMARY KEY (vacancy_id);
+        """,
+    ]),
+    (4, 'Диапазон и валюта зарплаты, зарплата в рублях', [
+        """
+        ALTER TABLE vacancies
+            ADD COLUMN IF NOT EXISTS salary_from INTEGER,
+            ADD COLUMN IF NOT EXISTS salary_to INTEGER,
+            ADD COLUMN IF NOT EXISTS salary_currency VARCHAR(3),
+            ADD COLUMN IF NOT EXISTS salary_gross BOOLEAN,
+            ADD COLUMN IF NOT EXISTS salary_normalized INTEGER;
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS exchange_rates (
+            currency VARCHAR(3) PRIMARY KEY,
+            rate NUMERIC NOT NULL CHECK (rate > 0),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        """,
+        """
+        INSERT INTO exchange_rates (currency, rate) VALUES ('RUR', 1) ON CONFLICT (currency) DO NOTHING;
+        """,
+        """
+        CREATE OR REPLACE FUNCTION normalize_salary(amount INTEGER, currency VARCHAR) RETURNS INTEGER AS $$
+            SELECT round(amount / rate)::INTEGER
+            FROM exchange_rates
+            WHERE exchange_rates.currency = COALESCE(normalize_salary.currency, 'RUR');
+        $$ LANGUAGE sql STABLE;
+        """,
+        """
+        CREATE OR REPLACE FUNCTION vacancies_normalize_salary() RETURNS trigger AS $$
+        BEGIN
+            NEW.salary_normalized := normalize_salary(NEW.salary, NEW.salary_currency);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        """
+        DROP TRIGGER IF EXISTS vacancies_normalize_salary ON vacancies;
+        """,
+        """
+        CREATE TRIGGER vacancies_normalize_salary
+        BEFORE INSERT OR UPDATE OF salary, salary_currency ON vacancies
+        FOR EACH ROW EXECUTE FUNCTION vacancies_normalize_salary();
+        """,
+        """
+        UPDATE vacancies SET salary_normalized = normalize_salary(salary, salary_currency);
+        """,
+        """
+        DROP INDEX IF EXISTS vacancies_salary_idx;
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS vacancies_salary_normalized_idx
+        ON vacancies (salary_normalized DESC, vacancy_id DESC) WHERE NOT archived;
+        """,
+        """
+        DROP MATERIALIZED VIEW IF EXISTS employer_stats;
+        """,
+        """
+        CREATE MATERIALIZED VIEW employer_stats AS
+        SELECT e.employer_id,
+               e.employer_name,
+               COUNT(v.vacancy_id) AS vacancies_count,
+               AVG(v.salary_normalized) AS avg_salary,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY v.salary_normalized) AS median_salary,
+               percentile_cont(0.25) WITHIN GROUP (ORDER BY v.salary_normalized) AS p25_salary,
+               percentile_cont(0.75) WITHIN GROUP (ORDER BY v.salary_normalized) AS p75_salary,
+               percentile_cont(0.9) WITHIN GROUP (ORDER BY v.salary_normalized) AS p90_salary
+        FROM employers e
+        LEFT JOIN vacancies v ON e.employer_id = v.employer_id AND NOT v.archived
+        GROUP BY e.employer_id, e.employer_name;
+        """,
+        """
+        CREATE UNIQUE INDEX employer_stats_employer_id_idx ON employer_stats (employer_id);
+        """,
+        """
+        DROP MATERIALIZED VIEW IF EXISTS salary_stats;
+        """,
+        """
+        CREATE MATERIALIZED VIEW salary_stats AS
+        SELECT 1 AS id,
+               COUNT(salary_normalized) AS vacancies_count,
+               AVG(salary_normalized) AS avg_salary,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY salary_normalized) AS median_salary,
+               percentile_cont(0.25) WITHIN GROUP (ORDER BY salary_normalized) AS p25_salary,
+               percentile_cont(0.75) WITHIN GROUP (ORDER BY salary_normalized) AS p75_salary,
+               percentile_cont(0.9) WITHIN GROUP (ORDER BY salary_normalized) AS p90_salary
+        FROM vacancies
+        WHERE NOT archived;
+        """,
+        """
+        CREATE UNIQUE INDEX salary_stats_id_idx ON salary_stats (id);
+        """,
+    ]),
+    (5, 'Версия данных для кэша отчётов', [
+        """
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+            version BIGINT NOT NULL DEFAULT 1,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        """,
+        """
+        INSERT INTO data_version (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+        """,
+    ]),
+    (6, 'Хэш содержимого вакансий для пропуска неизменённых строк', [
+        """
+        ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS content_hash BIGINT;
+        """,
+    ]),
+]
+
+
+def get_schema_version(cursor) -> int:
+    """
+    Returns the version of the last migration applied to the database.
+    Args:
+        cursor: The cursor to use.
+    Returns:
+        int: The schema version, 0 if no migration has been applied yet.
+    """
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+
+def migrate() -> int:
+    """
+    Brings the schema of the database up to date by applying the pending MIGRATIONS in order, each one in its
+    own transaction together with its record in the schema_migrations table. Databases created before the
+    migrations were introduced start from version 1, whose queries are idempotent, so they are upgraded in
+    place. Concurrent callers wait for each other on an advisory lock.
+
+    Schema changes are made by appending a migration; the queries of applied migrations must not be changed.
+    Returns:
+        int: The number of migrations applied.
+    """
+    applied = 0
+    with connection() as conn, conn.cursor() as cursor:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        """)
+        conn.commit()
+        for version, description, queries in MIGRATIONS:
+            try:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATIONS_LOCK_ID,))
+                if get_schema_version(cursor) >= version:
+                    conn.commit()
+                    continue
+                for query in queries:
+                    cursor.execute(query)
+                cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                               (version, description))
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Ошибка при применении миграции {version}: {e}")
+                conn.rollback()
+                raise
+            print(f"Применена миграция {version}: {description}")
+            applied += 1
+    return applied
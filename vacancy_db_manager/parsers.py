@@ -0,0 +1,90 @@
+import jmespath
+from typing import Any, Dict, List, Optional, Tuple
+
+EMPLOYER_FIELDS = ('employer_id', 'employer_name', 'url')
+VACANCY_FIELDS = ('vacancy_id', 'employer_id', 'name', 'description', 'salary', 'url', 'published_at', 'archived',
+                  'salary_from', 'salary_to', 'salary_currency', 'salary_gross')
+
+EMPLOYER_EXPRESSION = jmespath.compile("""
+{
+    employer_id: id,
+    employer_name: name,
+    url: alternate_url
+}
+""")
+
+
+def _to_int(value: Any) -> Optional[int]:
+    """
+    Converts an ID, which the API returns as a string, to an integer.
+    """
+    return int(value) if value is not None else None
+
+
+def parse_employer(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extracts the stored fields from an employer returned by the API.
+    Args:
+        data (Dict[str, Any]): An employer as returned by the API.
+    Returns:
+        Dict[str, Any]: A dictionary with 'employer_id', 'employer_name' and 'url'.
+    """
+    parsed_data = EMPLOYER_EXPRESSION.search(data)
+    parsed_data['employer_id'] = _to_int(parsed_data['employer_id'])
+    return parsed_data
+
+
+def parse_vacancy_row(vac: Dict[str, Any]) -> Tuple[Any, ...]:
+    """
+    Extracts the stored fields from a single vacancy returned by the API into a row.
+
+    The salary is the lower bound of the salary range, or the upper bound if there is no lower one, in the
+    currency of the vacancy; both bounds, the currency code and whether the salary is before tax are kept as
+    well. The description is the requirements snippet, or an empty string if there is none.
+    Args:
+        vac (Dict[str, Any]): A vacancy item as returned by the API.
+    Returns:
+        Tuple[Any, ...]: The values in the order of VACANCY_FIELDS.
+    """
+    salary = vac.get('salary') or {}
+    salary_from = salary.get('from')
+    employer = vac.get('employer') or {}
+    snippet = vac.get('snippet') or {}
+    return (
+        _to_int(vac.get('id')),
+        _to_int(employer.get('id')),
+        vac.get('name'),
+        snippet.get('requirement') or '',
+        salary_from if salary_from is not None else salary.get('to'),
+        vac.get('alternate_url'),
+        vac.get('published_at'),
+        vac.get('archived') or False,
+        salary_from,
+        salary.get('to'),
+        salary.get('currency'),
+        salary.get('gross'),
+    )
+
+
+def parse_vacancy_rows(items: List[Dict[str, Any]]) -> List[Tuple[Any, ...]]:
+    """
+    Parses a whole page of vacancy items into rows ready for bulk loading.
+    Args:
+        items (List[Dict[str, Any]]): The vacancy items of a page as returned by the API.
+    Returns:
+        List[Tuple[Any, ...]]: The rows in the order of VACANCY_FIELDS.
+    """
+    return [parse_vacancy_row(vac) for vac in items]
+
+
+def parse_vacancy(vac: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extracts the stored fields from a single vacancy returned by the API.
+    Args:
+        vac (Dict[str, Any]): A vacancy item as returned by the API.
+    Returns:
+        Dict[str, Any]: A dictionary with 'vacancy_id', 'employer_id', 'name', 'description', 'salary', 'url',
+                        'published_at', 'archived', 'salary_from', 'salary_to', 'salary_currency' and
+                        'salary_gross'.
+    """
+    return dict(zip(VACANCY_FIELDS, parse_vacancy_row(vac)))
@@ -0,0 +1,227 @@
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from queue import Empty, Full, Queue
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from config import API_MAX_WORKERS, BULK_BATCH_SIZE, PIPELINE_QUEUE_SIZE, logger
+from vacancy_db_manager.api_service import SEARCH_DEPTH, iter_raw_vacancy_pages
+from vacancy_db_manager.db_creator import VACANCY_COLUMNS, bulk_upsert
+from vacancy_db_manager.db_pool import connection
+from vacancy_db_manager.metrics import increment, span
+from vacancy_db_manager.parsers import parse_vacancy_rows
+
+_END = object()
+_POLL_INTERVAL = 0.1
+
+
+class _Page(NamedTuple):
+    employer_id: int
+    items: List[Dict[str, Any]]
+
+
+class _Rows(NamedTuple):
+    employer_id: int
+    rows: List[Tuple[Any, ...]]
+
+
+class _EmployerDone(NamedTuple):
+    employer_id: int
+    full: bool
+    ok: bool
+
+
+class _StageError(NamedTuple):
+    error: Exception
+
+
+def _put(queue: Queue, item: Any, stop: threading.Event) -> bool:
+    """
+    Puts an item into a bounded queue, blocking while it is full unless the pipeline is being stopped.
+    Returns:
+        bool: False if the pipeline was stopped before the item could be put.
+    """
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=_POLL_INTERVAL)
+            return True
+        except Full:
+            pass
+    return False
+
+
+def _get(queue: Queue, stop: threading.Event) -> Any:
+    """
+    Takes the next item from a queue, blocking while it is empty unless the pipeline is being stopped.
+    Returns:
+        Any: The item, or _END if the pipeline was stopped.
+    """
+    while not stop.is_set():
+        try:
+            return queue.get(timeout=_POLL_INTERVAL)
+        except Empty:
+            pass
+    return _END
+
+
+def _fetch_employer(job: Tuple[int, Optional[datetime]], pages: Queue, stop: threading.Event) -> None:
+    """
+    Fetches the vacancy pages of one employer into the pages queue and reports when the employer is done.
+    Nothing more is requested once the pipeline is being stopped.
+    """
+    if stop.is_set():
+        return
+    employer_id, since = job
+    date_from = since.isoformat(timespec='seconds') if since is not None else None
+    ok = True
+    try:
+        for items in iter_raw_vacancy_pages(employer_id, date_from):
+            if not _put(pages, _Page(employer_id, items), stop) or stop.is_set():
+                return
+    except Exception as e:
+        logger.error(f"Ошибка при получении вакансий работодателя {employer_id}: {e}")
+        ok = False
+    _put(pages, _EmployerDone(employer_id, since is None, ok), stop)
+
+
+def _fetch(jobs: List[Tuple[int, Optional[datetime]]], pages: Queue, stop: threading.Event) -> None:
+    """
+    The fetch stage: fetches the employers concurrently with at most API_MAX_WORKERS requests in flight. When the
+    pipeline is being stopped, the employers that have not been started yet are cancelled.
+    """
+    executor = ThreadPoolExecutor(max_workers=API_MAX_WORKERS)
+    futures = [executor.submit(_fetch_employer, job, pages, stop) for job in jobs]
+    while not stop.is_set() and wait(futures, timeout=_POLL_INTERVAL).not_done:
+        pass
+    executor.shutdown(cancel_futures=True)
+    _put(pages, _END, stop)
+
+
+def _parse(pages: Queue, rows: Queue, stop: threading.Event) -> None:
+    """
+    The parse stage: turns every page of vacancy items into rows ready for bulk loading. If parsing fails, the
+    error is passed on to the write stage, which stops the pipeline.
+    """
+    try:
+        while True:
+            item = _get(pages, stop)
+            if isinstance(item, _Page):
+                with span('parse_page'):
+                    item = _Rows(item.employer_id, parse_vacancy_rows(item.items))
+                increment('vacancies_parsed', len(item.rows))
+            if not _put(rows, item, stop) or item is _END:
+                return
+    except Exception as e:
+        logger.error(f"Ошибка при разборе вакансий: {e}")
+        _put(rows, _StageError(e), stop)
+
+
+def finish_employer(cursor, employer_id: int, seen_ids: List[int], full: bool, synced_at: datetime) -> None:
+    """
+    Records the synchronization of an employer whose vacancies have all been written.
+    After a full synchronization the stored vacancies that were not returned by the API are marked as
+    archived, unless the result hit the search depth limit of the API and may be incomplete. Their content
+    hash is cleared, so a vacancy that reappears is written again even if its content is the same.
+    Args:
+        cursor: The cursor to use. The caller is responsible for committing the transaction.
+        employer_id (int): The ID of the employer.
+        seen_ids (List[int]): The IDs of the vacancies returned by the API.
+        full (bool): Whether the vacancies are the complete list of the employer's vacancies.
+        synced_at (datetime): The start time of the synchronization.
+    Returns:
+        None
+    """
+    if full and len(seen_ids) < SEARCH_DEPTH:
+        cursor.execute(
+            "UPDATE vacancies SET archived = TRUE, content_hash = NULL "
+            "WHERE employer_id = %s AND NOT archived AND vacancy_id <> ALL(%s)",
+            (employer_id, seen_ids)
+        )
+    cursor.execute(
+        "INSERT INTO sync_state (employer_id, last_synced_at, last_full_sync_at) VALUES (%s, %s, %s) "
+        "ON CONFLICT (employer_id) DO UPDATE SET last_synced_at = EXCLUDED.last_synced_at, "
+        "last_full_sync_at = COALESCE(EXCLUDED.last_full_sync_at, sync_state.last_full_sync_at)",
+        (employer_id, synced_at, synced_at if full else None)
+    )
+
+
+def _write(rows: Queue, synced_at: datetime, stop: threading.Event,
+           on_employer_done: Optional[Callable[[int, int], None]]) -> int:
+    """
+    The write stage: upserts rows in batches of BULK_BATCH_SIZE and finishes every employer once all of its
+    rows have been committed.
+    Returns:
+        int: The number of rows written.
+    Raises:
+        Exception: The error of the parse stage if it failed.
+    """
+    written = 0
+    batch: List[Tuple[Any, ...]] = []
+    seen_ids: Dict[int, List[int]] = defaultdict(list)
+    employer_written: Dict[int, int] = defaultdict(int)
+    with connection() as conn, conn.cursor() as cursor:
+        def flush() -> None:
+            if batch:
+                bulk_upsert(cursor, 'vacancies', VACANCY_COLUMNS, 'vacancy_id', batch, update=True)
+                conn.commit()
+                batch.clear()
+
+        while (item := _get(rows, stop)) is not _END:
+            if isinstance(item, _StageError):
+                raise item.error
+            if isinstance(item, _Rows):
+                batch.extend(item.rows)
+                seen_ids[item.employer_id].extend(row[0] for row in item.rows)
+                employer_written[item.employer_id] += len(item.rows)
+                written += len(item.rows)
+                if len(batch) >= BULK_BATCH_SIZE:
+                    flush()
+            else:
+                flush()
+                employer_seen_ids = seen_ids.pop(item.employer_id, [])
+                if item.ok:
+                    finish_employer(cursor, item.employer_id, employer_seen_ids, item.full, synced_at)
+                    conn.commit()
+                increment('employers_synced', status='ok' if item.ok else 'failed')
+                if on_employer_done is not None:
+                    on_employer_done(item.employer_id, employer_written.pop(item.employer_id, 0))
+        flush()
+    return written
+
+
+def run_ingest(jobs: List[Tuple[int, Optional[datetime]]], synced_at: datetime,
+               on_employer_done: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Fetches, parses and loads the vacancies of several employers with the three stages running concurrently.
+
+    Fetcher threads put pages of vacancy items into a bounded queue, a parser thread turns them into rows
+    and puts them into a second bounded queue, and the calling thread writes the rows to the database in
+    batches. Since the queues hold at most PIPELINE_QUEUE_SIZE pages each, memory use does not depend on the
+    number of employers or vacancies.
+    Args:
+        jobs (List[Tuple[int, Optional[datetime]]]): The ID of every employer and the time since which its
+                                                      vacancies are fetched, None to fetch all of them.
+        synced_at (datetime): The start time of the synchronization recorded for every finished employer.
+        on_employer_done (Optional[Callable[[int, int], None]]): Called with the employer ID and the number of
+                                                                  written vacancies when an employer is done.
+    Returns:
+        int: The number of vacancies written.
+    Raises:
+        Exception: If a page could not be parsed or the rows could not be written; the other stages are stopped.
+    """
+    pages: Queue = Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    rows: Queue = Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    stop = threading.Event()
+    stages = [
+        threading.Thread(target=_fetch, args=(jobs, pages, stop), daemon=True),
+        threading.Thread(target=_parse, args=(pages, rows, stop), daemon=True),
+    ]
+    for stage in stages:
+        stage.start()
+    try:
+        return _write(rows, synced_at, stop, on_employer_done)
+    finally:
+        stop.set()
+        for stage in stages:
+            stage.join()
@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+from config import RESULT_CACHE_MAX_ROWS, RESULT_CACHE_SIZE
+from vacancy_db_manager.metrics import increment
+
+_cache: Optional['ResultCache'] = None
+_cache_lock = threading.Lock()
+
+_LOCK_STRIPES = 64
+
+
+class ResultCache:
+    def __init__(self, max_entries: int, max_rows: int) -> None:
+        """
+        Initializes a thread-safe in-memory cache of query results. Every result is stored with the data
+        version it was computed for and is only returned for that version, so bumping the version invalidates
+        all results at once. When there are more than max_entries results, the least recently used ones are
+        evicted.
+        Args:
+            max_entries (int): The maximum number of stored results.
+            max_rows (int): Results with more rows are not stored, to bound memory use.
+        """
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._entries: 'OrderedDict[Hashable, Tuple[int, List[Tuple[Any, ...]]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._compute_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+    def get(self, key: Hashable, version: int) -> Optional[List[Tuple[Any, ...]]]:
+        """
+        Looks up the result for a key and marks it as recently used.
+        Args:
+            key (Hashable): The key of the result, e.g. the query and its parameters.
+            version (int): The current data version.
+        Returns:
+            Optional[List[Tuple[Any, ...]]]: The rows, or None if there is no result for this data version.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, version: int, rows: List[Tuple[Any, ...]]) -> None:
+        """
+        Stores the result for a key, replacing the previous one, and evicts old results if needed.
+        Args:
+            key (Hashable): The key of the result.
+            version (int): The data version the result was computed for.
+            rows (List[Tuple[Any, ...]]): The rows. They must not be modified afterwards.
+        """
+        if len(rows) > self.max_rows:
+            return
+        with self._lock:
+            self._entries[key] = (version, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, version: int,
+                       compute: Callable[[], List[Tuple[Any, ...]]]) -> List[Tuple[Any, ...]]:
+        """
+        Returns the stored result for a key, computing and storing it if there is none. Concurrent callers
+        asking for the same key wait for a single computation instead of running the query several times.
+        Args:
+            key (Hashable): The key of the result.
+            version (int): The current data version.
+            compute (Callable[[], List[Tuple[Any, ...]]]): Computes the rows.
+        Returns:
+            List[Tuple[Any, ...]]: The rows.
+        """
+        rows = self.get(key, version)
+        if rows is None:
+            with self._compute_locks[hash(key) % _LOCK_STRIPES]:
+                rows = self.get(key, version)
+                if rows is None:
+                    increment('result_cache_lookups', result='miss')
+                    rows = compute()
+                    self.put(key, version, rows)
+                    return rows
+        increment('result_cache_lookups', result='hit')
+        return rows
+
+    def clear(self) -> None:
+        """
+        Removes all stored results.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Returns the process-wide query result cache, creating it on first use.
+    Returns:
+        Optional[ResultCache]: The cache, or None if caching is disabled by RESULT_CACHE_SIZE set to 0.
+    """
+    global _cache
+    if RESULT_CACHE_SIZE <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_MAX_ROWS)
+        return _cache
@@ -0,0 +1,144 @@
+import multiprocessing
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import API_REQUESTS_PER_SECOND, INGEST_WORKERS, logger
+from vacancy_db_manager.db_creator import format_upsert_counts, get_upsert_counts, refresh_statistics
+from vacancy_db_manager.employers import load_employer_ids
+from vacancy_db_manager.http_client import (RequestFailure, clear_failure_report, get_failure_report,
+                                            merge_failure_report, set_requests_per_second)
+from vacancy_db_manager.metrics import get_metrics, merge_metrics, profile
+from vacancy_db_manager.sync import prepare_database, print_failure_report, sync_employers
+
+
+def shard_of(employer_id: int, shard_count: int) -> int:
+    """
+    Returns the shard an employer belongs to. The hash is stable across processes and machines, so every
+    worker or node computes the same split.
+    Args:
+        employer_id (int): The ID of the employer.
+        shard_count (int): The total number of shards.
+    Returns:
+        int: The shard index, from 0 to shard_count - 1.
+    """
+    return zlib.crc32(str(employer_id).encode()) % shard_count
+
+
+def split_into_shards(employer_ids: List[int], shard_count: int) -> List[List[int]]:
+    """
+    Splits employer IDs into shards, see `shard_of`.
+    Args:
+        employer_ids (List[int]): The employer IDs.
+        shard_count (int): The total number of shards.
+    Returns:
+        List[List[int]]: The employer IDs of every shard.
+    """
+    shards: List[List[int]] = [[] for _ in range(shard_count)]
+    for employer_id in employer_ids:
+        shards[shard_of(employer_id, shard_count)].append(employer_id)
+    return shards
+
+
+def sync_shard(shard_index: int, shard_count: int, employer_ids: Optional[List[int]] = None,
+               full: bool = False, progress=None) -> int:
+    """
+    Synchronizes the employers of one shard. Can be run on its own, e.g. on a separate node, as long as
+    every node uses the same employer list and shard count.
+    Args:
+        shard_index (int): The index of the shard to synchronize.
+        shard_count (int): The total number of shards.
+        employer_ids (Optional[List[int]]): All tracked employer IDs, see `load_employer_ids` by default.
+        full (bool): Whether every employer is fully synchronized regardless of its state.
+        progress: An optional queue that receives (shard_index, employer_id, vacancies) for every finished
+                  employer.
+    Returns:
+        int: The number of synchronized vacancies.
+    """
+    employer_ids = load_employer_ids() if employer_ids is None else employer_ids
+    shard_employer_ids = split_into_shards(employer_ids, shard_count)[shard_index]
+    if not shard_employer_ids:
+        return 0
+
+    def on_employer_done(employer_id: int, vacancies: int) -> None:
+        if progress is not None:
+            progress.put((shard_index, employer_id, vacancies))
+
+    with profile(f'shard-{shard_index}'):
+        return sync_employers(shard_employer_ids, full, on_employer_done)
+
+
+def _sync_shard_in_worker(shard_index: int, shard_count: int, employer_ids: List[int], full: bool,
+                          progress) -> Tuple[int, Dict[str, Any], Dict[str, List[RequestFailure]]]:
+    """
+    Runs `sync_shard` in a worker process and returns the metrics and the failed requests of the worker along
+    with its result, so they are exported and reported by the parent process.
+    """
+    clear_failure_report()
+    synced = sync_shard(shard_index, shard_count, employer_ids, full, progress)
+    return synced, get_metrics(), get_failure_report()
+
+
+def _report_progress(progress, shards: List[List[int]]) -> None:
+    """
+    Prints the progress of every shard as workers report finished employers, until None is received.
+    """
+    done: Dict[int, int] = {index: 0 for index in range(len(shards))}
+    vacancies: Dict[int, int] = {index: 0 for index in range(len(shards))}
+    while (message := progress.get()) is not None:
+        shard_index, _, shard_vacancies = message
+        done[shard_index] += 1
+        vacancies[shard_index] += shard_vacancies
+        print(f"Шард {shard_index}: {done[shard_index]}/{len(shards[shard_index])} работодателей, "
+              f"{vacancies[shard_index]} вакансий")
+
+
+def run_sharded_sync(workers: int = INGEST_WORKERS, employer_ids: Optional[List[int]] = None,
+                     full: bool = False, rebuild: bool = False) -> int:
+    """
+    Synchronizes the database with the tracked employers split into shards by employer ID, one worker
+    process per shard. Every worker has its own HTTP session, connection pool and ingest pipeline; the API
+    request rate limit is divided between the workers. The statistics are refreshed once all shards are done,
+    and the metrics and failed requests of the workers are added to those of this process, see
+    `get_failure_report`.
+    Args:
+        workers (int): The number of worker processes and shards.
+        employer_ids (Optional[List[int]]): The employer IDs, see `load_employer_ids` by default.
+        full (bool): Whether every employer is fully synchronized regardless of its state.
+        rebuild (bool): Whether the database is dropped and created from scratch first.
+    Returns:
+        int: The number of synchronized vacancies.
+    """
+    prepare_database(rebuild)
+    employer_ids = load_employer_ids() if employer_ids is None else employer_ids
+    shards = split_into_shards(employer_ids, workers)
+    counts_before = get_upsert_counts('vacancies')
+    clear_failure_report()
+
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager:
+        progress = manager.Queue()
+        reporter = threading.Thread(target=_report_progress, args=(progress, shards), daemon=True)
+        reporter.start()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=set_requests_per_second,
+                                 initargs=(API_REQUESTS_PER_SECOND / workers,)) as executor:
+            futures = [executor.submit(_sync_shard_in_worker, index, workers, employer_ids, full, progress)
+                       for index in range(workers)]
+            synced = 0
+            for index, future in enumerate(futures):
+                try:
+                    shard_synced, shard_metrics, shard_failures = future.result()
+                    synced += shard_synced
+                    merge_metrics(shard_metrics)
+                    merge_failure_report(shard_failures)
+                except Exception as e:
+                    logger.error(f"Ошибка при синхронизации шарда {index}: {e}")
+        progress.put(None)
+        reporter.join()
+
+    print(f"Синхронизировано {synced} вакансий от {len(employer_ids)} работодателей: "
+          f"{format_upsert_counts(get_upsert_counts('vacancies', counts_before))}")
+    print_failure_report()
+    refresh_statistics()
+    return synced
@@ -0,0 +1,190 @@
+"""
+Offline snapshots of the data fetched from the API.
+
+A snapshot is a JSON Lines file: a header with the format version and the columns of every table, then one
+line per row, ["employers", [...]] or ["vacancies", [...]], with all employers before the vacancies. Files
+ending with '.zst' are compressed with Zstandard (requires the zstandard package), '.gz' with gzip.
+"""
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from config import API_MAX_WORKERS, BULK_BATCH_SIZE, logger
+from vacancy_db_manager.api_service import get_employers, get_vacancies
+from vacancy_db_manager.db_creator import (EMPLOYER_COLUMNS, VACANCY_COLUMNS, bulk_upsert, refresh_statistics,
+                                           vacancy_rows)
+from vacancy_db_manager.db_pool import connection
+from vacancy_db_manager.employers import load_employer_ids
+from vacancy_db_manager.http_client import FetchError, clear_failure_report, map_concurrently
+from vacancy_db_manager.metrics import span
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SNAPSHOT_FORMAT = 'vacancy-snapshot'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_KEYS = {'employers': 'employer_id', 'vacancies': 'vacancy_id'}
+SNAPSHOT_EXTENSION = '.jsonl.zst' if zstandard is not None else '.jsonl.gz'
+
+
+def open_snapshot(path: str, mode: str) -> TextIO:
+    """
+    Opens a snapshot file as text, compressing or decompressing it as a stream according to its extension.
+    Args:
+        path (str): The path of the file.
+        mode (str): 'r' to read or 'w' to write.
+    Returns:
+        TextIO: The file object.
+    Raises:
+        RuntimeError: If the file ends with '.zst' and the zstandard package is not installed.
+    """
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("Для снимков в формате .zst требуется пакет zstandard")
+        raw = open(path, mode + 'b')
+        if mode == 'r':
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        else:
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8', compresslevel=6)
+    return open(path, mode, encoding='utf-8')
+
+
+def _write_row(fp: TextIO, table: str, row: Any) -> None:
+    """
+    Writes one row of a table as a line of the snapshot.
+    """
+    fp.write(json.dumps([table, list(row)], ensure_ascii=False, separators=(',', ':'), default=str))
+    fp.write('\n')
+
+
+def _get_vacancies_or_none(employer_id: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Fetches the vacancies of an employer for `export_snapshot`.
+    Returns:
+        Optional[List[Dict[str, Any]]]: The vacancies, or None if they could not be fetched. The failed requests
+                                        are in the failure report, see `get_failure_report`.
+    """
+    try:
+        return get_vacancies(employer_id)
+    except FetchError as e:
+        logger.error(f"Не удалось получить вакансии работодателя {employer_id}, они не попадут в снимок: {e}")
+        return None
+
+
+def export_snapshot(path: str, employer_ids: Optional[List[int]] = None) -> Dict[str, int]:
+    """
+    Fetches the employers and their vacancies from the API and writes them to a snapshot instead of the
+    database, see `load_snapshot`. Vacancies are fetched for API_MAX_WORKERS employers at a time and written
+    as they arrive. The file is written under a temporary name with the same extension and renamed when complete.
+    As in `sync_database`, an employer whose vacancies could not be fetched does not stop the export: its
+    vacancies are left out of the snapshot and the failed requests are recorded in the failure report, which is
+    cleared first.
+    Args:
+        path (str): The path of the snapshot.
+        employer_ids (Optional[List[int]]): The IDs of the employers, by default the tracked employers, see
+                                            `load_employer_ids`.
+    Returns:
+        Dict[str, int]: The number of written rows by table.
+    """
+    clear_failure_report()
+    employers = get_employers(load_employer_ids() if employer_ids is None else employer_ids)
+    counts = {'employers': 0, 'vacancies': 0}
+    temporary_path = os.path.join(os.path.dirname(path), f'.tmp-{os.path.basename(path)}')
+    try:
+        with span('export_snapshot'), open_snapshot(temporary_path, 'w') as fp:
+            header = {'format': SNAPSHOT_FORMAT, 'version': SNAPSHOT_VERSION,
+                      'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                      'columns': {'employers': list(EMPLOYER_COLUMNS), 'vacancies': list(VACANCY_COLUMNS)}}
+            fp.write(json.dumps(header, ensure_ascii=False) + '\n')
+            for employer in employers:
+                _write_row(fp, 'employers', (employer[column] for column in EMPLOYER_COLUMNS))
+                counts['employers'] += 1
+
+            fetched_ids = [employer['employer_id'] for employer in employers]
+            for start in range(0, len(fetched_ids), API_MAX_WORKERS):
+                for vacancies in map_concurrently(_get_vacancies_or_none,
+                                                  fetched_ids[start:start + API_MAX_WORKERS]):
+                    if vacancies is None:
+                        continue
+                    for row in vacancy_rows(vacancies):
+                        _write_row(fp, 'vacancies', row)
+                        counts['vacancies'] += 1
+        os.replace(temporary_path, path)
+    except Exception:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    return counts
+
+
+def iter_snapshot(path: str, batch_size: int = BULK_BATCH_SIZE) -> Iterator[Tuple[str, List[str], List[List[Any]]]]:
+    """
+    Reads a snapshot as a stream, so memory use does not depend on its size.
+    Args:
+        path (str): The path of the snapshot.
+        batch_size (int): The maximum number of rows in a batch.
+    Yields:
+        Tuple[str, List[str], List[List[Any]]]: The table, its columns as written in the snapshot and a batch of
+                                                consecutive rows of the table.
+    Raises:
+        ValueError: If the file is not a snapshot or has an unsupported version.
+    """
+    with open_snapshot(path, 'r') as fp:
+        try:
+            header = json.loads(fp.readline())
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Файл {path} не является снимком данных")
+        if header.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия снимка данных: {header.get('version')}")
+        columns = header['columns']
+
+        table, batch = None, []
+        for line in fp:
+            if not line.strip():
+                continue
+            row_table, row = json.loads(line)
+            if row_table not in SNAPSHOT_KEYS:
+                raise ValueError(f"Неизвестная таблица в снимке данных: {row_table}")
+            if row_table != table or len(batch) >= batch_size:
+                if batch:
+                    yield table, columns[table], batch
+                table, batch = row_table, []
+            batch.append(row)
+        if batch:
+            yield table, columns[table], batch
+
+
+def load_snapshot(path: str, update: bool = True) -> Dict[str, int]:
+    """
+    Loads a snapshot, see `export_snapshot`, into the database through `bulk_upsert` without touching the
+    API. Every batch of BULK_BATCH_SIZE rows is committed on its own, and the statistics are refreshed at the
+    end.
+    Args:
+        path (str): The path of the snapshot.
+        update (bool): Whether already stored employers and vacancies are updated.
+    Returns:
+        Dict[str, int]: The number of loaded rows by table.
+    """
+    counts = {'employers': 0, 'vacancies': 0}
+    with span('load_snapshot'), connection() as conn, conn.cursor() as cursor:
+        try:
+            for table, columns, rows in iter_snapshot(path):
+                bulk_upsert(cursor, table, columns, SNAPSHOT_KEYS[table], rows, update=update)
+                conn.commit()
+                counts[table] += len(rows)
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке снимка данных {path}: {e}")
+            conn.rollback()
+            raise
+    refresh_statistics()
+    return counts
@@ -0,0 +1,139 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import FULL_SYNC_INTERVAL_HOURS, logger
+from vacancy_db_manager.api_service import get_employers
+from vacancy_db_manager.db_creator import (create_database, create_tables, ensure_database, format_upsert_counts,
+                                           get_upsert_counts, insert_employers, refresh_statistics)
+from vacancy_db_manager.db_pool import connection
+from vacancy_db_manager.employers import load_employer_ids
+from vacancy_db_manager.exchange_rates import load_exchange_rates
+from vacancy_db_manager.http_client import clear_failure_report, get_failure_report
+from vacancy_db_manager.metrics import profile, timed
+from vacancy_db_manager.pipeline import run_ingest
+
+
+def get_sync_state() -> Dict[int, Tuple[datetime, Optional[datetime]]]:
+    """
+    Reads the time of the last synchronization of every employer.
+    Returns:
+        Dict[int, Tuple[datetime, Optional[datetime]]]: The last sync time and the last full sync time
+                                                       keyed by employer ID.
+    """
+    with connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT employer_id, last_synced_at, last_full_sync_at FROM sync_state")
+        return {employer_id: (synced_at, full_synced_at) for employer_id, synced_at, full_synced_at in cursor}
+
+
+def is_full_sync_due(state: Optional[Tuple[datetime, Optional[datetime]]], now: datetime) -> bool:
+    """
+    Decides whether an employer needs a full synchronization instead of an incremental one.
+    Args:
+        state (Optional[Tuple[datetime, Optional[datetime]]]): The sync state of the employer, None if it has
+                                                               never been synchronized.
+        now (datetime): The start time of the current synchronization.
+    Returns:
+        bool: True if all vacancies of the employer have to be fetched.
+    """
+    if state is None or state[1] is None:
+        return True
+    return now - state[1] >= timedelta(hours=FULL_SYNC_INTERVAL_HOURS)
+
+
+def prepare_database(rebuild: bool = False) -> None:
+    """
+    Creates the database if it does not exist yet (or recreates it), brings its tables up to date and updates
+    the exchange rates used to convert salaries to roubles.
+    Args:
+        rebuild (bool): Whether the database is dropped and created from scratch.
+    Returns:
+        None
+    """
+    dbname = os.getenv('DATABASE_NAME')
+    if rebuild:
+        create_database(dbname)
+    else:
+        ensure_database(dbname)
+    create_tables()
+    load_exchange_rates()
+
+
+@timed('sync_employers')
+def sync_employers(employer_ids: List[int], full: bool = False,
+                   on_employer_done: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Brings the vacancies of the given employers up to date with the API.
+
+    Employers that have never been synchronized, or whose last full synchronization is older than
+    FULL_SYNC_INTERVAL_HOURS, get all their vacancies fetched and the vanished ones archived. For the others
+    only the vacancies published since the last synchronization are fetched and upserted. Fetching, parsing
+    and loading overlap, see `run_ingest`. The statistics are not refreshed.
+    Args:
+        employer_ids (List[int]): The IDs of the employers to synchronize.
+        full (bool): Whether every employer is fully synchronized regardless of its state.
+        on_employer_done (Optional[Callable[[int, int], None]]): Called with the employer ID and the number of
+                                                                  written vacancies when an employer is done.
+    Returns:
+        int: The number of synchronized vacancies.
+    """
+    now = datetime.now(timezone.utc)
+    state = get_sync_state()
+    new_employer_ids = [employer_id for employer_id in employer_ids if employer_id not in state]
+    if full:
+        insert_employers(get_employers(employer_ids), update=True)
+    elif new_employer_ids:
+        insert_employers(get_employers(new_employer_ids), update=True)
+
+    with connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT employer_id FROM employers WHERE employer_id = ANY(%s)", (employer_ids,))
+        stored_employer_ids = {row[0] for row in cursor}
+
+    jobs = []
+    for employer_id in employer_ids:
+        if employer_id not in stored_employer_ids:
+            continue
+        employer_state = state.get(employer_id)
+        full_sync = full or is_full_sync_due(employer_state, now)
+        jobs.append((employer_id, None if full_sync else employer_state[0]))
+
+    try:
+        return run_ingest(jobs, now, on_employer_done)
+    except Exception as e:
+        logger.error(f"Ошибка при синхронизации вакансий: {e}")
+        return 0
+
+
+def sync_database(employer_ids: Optional[List[int]] = None, full: bool = False, rebuild: bool = False) -> None:
+    """
+    Brings the database up to date with the API without recreating it, see `sync_employers`.
+    The synchronization is profiled if PROFILER is set, see `profile`.
+    Args:
+        employer_ids (Optional[List[int]]): The IDs of the employers to synchronize, by default the tracked
+                                            employers, see `load_employer_ids`.
+        full (bool): Whether every employer is fully synchronized regardless of its state.
+        rebuild (bool): Whether the database is dropped and created from scratch first.
+    Returns:
+        None
+    """
+    prepare_database(rebuild)
+    employer_ids = load_employer_ids() if employer_ids is None else employer_ids
+    clear_failure_report()
+    counts_before = get_upsert_counts('vacancies')
+    with profile('sync'):
+        synced = sync_employers(employer_ids, full)
+    print(f"Синхронизировано {synced} вакансий от {len(employer_ids)} работодателей: "
+          f"{format_upsert_counts(get_upsert_counts('vacancies', counts_before))}")
+    print_failure_report()
+    refresh_statistics()
+
+
+def print_failure_report() -> None:
+    """
+    Prints how many API requests could not be completed during the synchronization, by endpoint.
+    The employers affected by them are synchronized again on the next run.
+    Returns:
+        None
+    """
+    for endpoint, failures in get_failure_report().items():
+        print(f"Не удалось получить {len(failures)} ответов от {endpoint}, подробности в database_errors.log")
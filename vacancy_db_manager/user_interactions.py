@@ -1,9 +1,7 @@
-import os
-from vacancy_db_manager.api_service import get_employers, get_all_vacancies
-from vacancy_db_manager.db_creator import (create_database, create_tables,
-                                           insert_employers, insert_vacancies)
-from vacancy_db_manager.db_manager import DBManager
-from config import DATABASE_CONFIG
+from vacancy_db_manager.db_manager import ALL_VACANCIES_FIELD_NAMES, DBManager, start_precompute_reports
+from vacancy_db_manager.exporters import iter_tables
+from vacancy_db_manager.sync import sync_database
+from config import DATABASE_CONFIG, REPORT_CHUNK_SIZE
 
 
 def main_user_menu() -> None:
@@ -12,16 +10,9 @@ def main_user_menu() -> None:
     """
     input('Добро пожаловать!\nНажмите Enter для начала работы\n')
 
-    print('Получение вакансий из API hh.ru. Пожалуйста подождите ...\n')
-    employers_data = get_employers()
-    vacancies_data = get_all_vacancies()
-    print(f'Получено {len(vacancies_data)} вакансий от {len(employers_data)} работадателей\n')
-
-    print('Создание и наполнение базы данных ...\n')
-    create_database(os.getenv('DATABASE_NAME'))
-    create_tables()
-    insert_employers(employers_data)
-    insert_vacancies(vacancies_data)
+    print('Синхронизация базы данных с API hh.ru. Пожалуйста подождите ...\n')
+    sync_database()
+    start_precompute_reports(DATABASE_CONFIG)
     print()
 
     while True:
@@ -71,10 +62,12 @@ def menu_get_all_vac() -> None:
         'Получить список всех вакансий с указанием компании, вакансии, зарплаты и ссылки на вакансию'
     """
     with DBManager(DATABASE_CONFIG) as db_manager:
-        vacancies_table = db_manager.get_all_vacancies()
-        if vacancies_table:
+        has_rows = False
+        for vacancies_table in iter_tables(db_manager.iter_all_vacancies(), ALL_VACANCIES_FIELD_NAMES,
+                                           REPORT_CHUNK_SIZE):
             print(vacancies_table)
-        else:
+            has_rows = True
+        if not has_rows:
             print("\nНет данных для отображения.")
 
 
@@ -111,7 +104,7 @@ def menu_get_vac_keyword() -> None:
     """
     user_input = input('\nВведите слово для поиска\n')
     with DBManager(DATABASE_CONFIG) as db_manager:
-        vac_keyword = db_manager.get_vacancies_with_keyword(user_input)
+        vac_keyword = db_manager.search_vacancies(user_input)
         if vac_keyword:
             print(vac_keyword)
         else: